@@ -0,0 +1,1158 @@
+"""Streamlit-free loading, filtering and aggregation of the job postings, shared by the dashboard and the CLI."""
+import os
+import re
+import copy
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import requests
+from scipy import sparse
+
+from ingest import (
+    DIMENSION_COLUMNS,
+    INGEST_WORKERS,
+    JOB_TYPE_RULES,
+    SALARY_ANNUAL_RANGE,
+    TEXT_COLUMNS,
+    align_categories,
+    append_rows,
+    clean_data,
+    discover_shards,
+    is_remote,
+    read_csv_streaming,
+    read_shards,
+    shards_fingerprint,
+)
+from dedup import DuplicateIndex
+from search import SearchIndex
+from storage import save_optional
+from titles import TitleMapping
+
+# --- Constants ---
+TOP_N_CATEGORIES = 15
+TOP_N_TITLES = 10
+TOP_N_COMPANIES = 10
+TOP_N_SKILLS = 10
+DATA_URL = "https://drive.google.com/uc?export=download&id=17jcNGGMozYXj-MJtYhqhpJqVATeOQGQ7" # Direct download link (ensure it remains valid)
+# A CSV URL, or a local CSV file, directory of CSV shards, or manifest (.txt/.json) listing shard paths/URLs
+DATA_SOURCE = os.environ.get("JOBS_DATA_SOURCE", DATA_URL)
+FILTER_COLUMNS = ['category', 'state'] # Sidebar filters backed by the row index
+
+# --- Incremental Ingest ---
+# New or changed postings dropped as CSV files in this directory are merged into the loaded data
+DELTA_DIR = os.environ.get("JOBS_DELTA_DIR", "deltas")
+DELTA_POLL_SECONDS = 30 # Minimum time between checks for new delta files
+
+# --- Skills Dictionary ---
+# Default skills; put one skill per line in JOBS_SKILLS_PATH to use a larger dictionary instead
+SKILLS_LIST = [
+    "Python", "JavaScript", "Java", "C++", "C#", "SQL", "NoSQL", "AWS", "Azure", "GCP",
+    "Docker", "Kubernetes", "Terraform", "React", "Angular", "Vue", "Node.js",
+    "Data Analysis", "Machine Learning", "Deep Learning", "AI", "Statistics", "Pandas", "NumPy", "Scikit-learn",
+    "Communication", "Leadership", "Management", "Project Management", "Agile", "Scrum"
+]
+SKILLS_PATH = os.environ.get("JOBS_SKILLS_PATH", "skills.txt")
+
+
+# --- Local Snapshot ---
+# Cleaned, typed copy of the dataset kept on disk so restarts do not re-download and re-parse the CSV
+SNAPSHOT_DIR = os.environ.get("JOBS_SNAPSHOT_DIR", ".snapshot")
+SNAPSHOT_PATH = os.path.join(SNAPSHOT_DIR, "jobs.parquet")
+SNAPSHOT_META_PATH = os.path.join(SNAPSHOT_DIR, "jobs.meta.json")
+SNAPSHOT_VERSION = 6 # Bump whenever the cleaning changes what is stored in the snapshot
+SEARCH_INDEX_PATH = os.path.join(SNAPSHOT_DIR, "search.npz") # Full-text index, tied to the data by its fingerprint
+TITLE_MAPPING_PATH = os.path.join(SNAPSHOT_DIR, "titles.json") # Raw to canonical job titles, grown across reloads
+DUPLICATES_PATH = os.path.join(SNAPSHOT_DIR, "duplicates.npz") # MinHash signatures and near-duplicate clusters
+
+
+# --- Data Loading ---
+def read_snapshot_meta():
+    """Returns the metadata of the local snapshot, or an empty dict if there is no usable snapshot."""
+    try:
+        with open(SNAPSHOT_META_PATH, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if meta.get("version") != SNAPSHOT_VERSION or not os.path.exists(SNAPSHOT_PATH):
+        return {} # Stale format or missing data file, treat as no snapshot
+    if meta.get("job_type_rules") != JOB_TYPE_RULES:
+        return {} # Stored job type labels were computed with different rules
+    if meta.get("source") != DATA_SOURCE:
+        return {} # Snapshot of a different data source
+    return meta
+
+
+def read_snapshot():
+    """Reads the cleaned, typed frame from the local snapshot. Returns None if it cannot be read."""
+    try:
+        df = pd.read_parquet(SNAPSHOT_PATH)
+        logging.info(f"Loaded local snapshot from {SNAPSHOT_PATH}. Shape: {df.shape}")
+        return df
+    except Exception as e:
+        logging.warning(f"Could not read local snapshot at {SNAPSHOT_PATH}: {e}")
+        return None
+
+
+def write_snapshot(df, meta):
+    """Atomically writes the cleaned frame and its metadata to the local snapshot directory."""
+    if save_optional(SNAPSHOT_PATH, lambda f: df.to_parquet(f, index=False), "local snapshot"):
+        write_snapshot_meta(meta)
+        logging.info(f"Saved local snapshot to {SNAPSHOT_PATH}.")
+
+
+def write_snapshot_meta(meta):
+    """Atomically writes the snapshot metadata (version, validators, content hash)."""
+    try:
+        with open(SNAPSHOT_META_PATH + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(SNAPSHOT_META_PATH + ".tmp", SNAPSHOT_META_PATH)
+    except OSError as e:
+        logging.warning(f"Could not write snapshot metadata to {SNAPSHOT_META_PATH}: {e}")
+
+
+def load_url_data(meta):
+    """Downloads and parses the CSV at DATA_SOURCE unless the local snapshot is still current."""
+    # Conditional request: Drive answers 304 Not Modified if our snapshot is still current
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    logging.info(f"Attempting to download data from: {DATA_SOURCE}")
+
+    response = requests.get(DATA_SOURCE, headers=headers, stream=True, timeout=30) # Added timeout
+    if response.status_code == 304 and meta:
+        response.close()
+        logging.info("Source not modified since last download. Using local snapshot.")
+        df = read_snapshot()
+        if df is not None:
+            return df
+        # Snapshot unreadable, fetch the full file unconditionally
+        response = requests.get(DATA_SOURCE, stream=True, timeout=30)
+
+    with response:
+        response.raise_for_status() # Raises HTTPError for bad responses (4XX, 5XX)
+
+        # Parse and clean the CSV chunk by chunk while it downloads, hashing the bytes on the way
+        hasher = hashlib.sha256()
+        df = read_csv_streaming(response, hasher)
+        logging.info(f"Successfully loaded CSV. Shape: {df.shape}")
+
+    new_meta = {
+        "version": SNAPSHOT_VERSION,
+        "job_type_rules": JOB_TYPE_RULES,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": hasher.hexdigest(),
+        "source": DATA_SOURCE,
+    }
+    # Drive does not always send validators, so also compare the content hash
+    if meta and meta.get("sha256") == new_meta["sha256"]:
+        logging.info("Downloaded content matches the local snapshot. Keeping snapshot file.")
+        write_snapshot_meta(new_meta) # Remember the fresh validators for next time
+    else:
+        write_snapshot(df, new_meta)
+    return df
+
+
+def load_shard_data(meta):
+    """Parses the local or remote CSV shards of DATA_SOURCE in parallel unless the local snapshot is still current."""
+    shards = discover_shards(DATA_SOURCE)
+    fingerprint = shards_fingerprint(shards)
+    if meta and fingerprint and meta.get("fingerprint") == fingerprint:
+        logging.info(f"None of the {len(shards)} shards changed since the last load. Using local snapshot.")
+        df = read_snapshot()
+        if df is not None:
+            return df
+
+    logging.info(f"Loading {len(shards)} CSV shards from: {DATA_SOURCE}")
+    df = read_shards(shards)
+    write_snapshot(df, {
+        "version": SNAPSHOT_VERSION,
+        "job_type_rules": JOB_TYPE_RULES,
+        "fingerprint": fingerprint,
+        "source": DATA_SOURCE,
+    })
+    return df
+
+def load_source(meta):
+    """Loads the cleaned frame from DATA_SOURCE, or from the local snapshot if meta shows it is still current."""
+    if is_remote(DATA_SOURCE):
+        return load_url_data(meta)
+    return load_shard_data(meta)
+
+
+# --- Row Index ---
+class RowIndex:
+    """Inverted index mapping each level of the filter columns to the sorted row ids that hold it."""
+
+    def __init__(self, df, columns):
+        self.rows = {}
+        for col in columns:
+            codes = df[col].cat.codes.to_numpy()
+            levels = df[col].cat.categories
+            # A stable sort by code groups the row ids per level and keeps them ascending within each group
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(levels) + 1))
+            self.rows[col] = {level: order[bounds[i]:bounds[i + 1]] for i, level in enumerate(levels)}
+        logging.info(f"Built row index over {columns} for {len(df)} rows.")
+
+    def select(self, selections):
+        """Returns the sorted row ids matching every column's selected values, or None when nothing is filtered."""
+        result = None
+        for col, values in selections.items():
+            if not values:
+                continue # No values selected means "All" for this column
+            matched = [self.rows[col][value] for value in values if value in self.rows[col]]
+            matched = np.sort(np.concatenate(matched)) if matched else np.empty(0, dtype=np.intp)
+            result = matched if result is None else np.intersect1d(result, matched, assume_unique=True)
+        return result
+
+    def copy(self):
+        """An index sharing the row id arrays; add and remove replace them rather than writing to them."""
+        clone = RowIndex.__new__(RowIndex)
+        clone.rows = {col: dict(levels) for col, levels in self.rows.items()}
+        return clone
+
+    def add(self, frame, row_ids):
+        """Adds the given row ids under the levels frame holds for them (frame is row-aligned with row_ids)."""
+        for col, levels in self.rows.items():
+            for level, ids in pd.Series(row_ids).groupby(frame[col].astype(str).to_numpy()):
+                current = levels.get(level, np.empty(0, dtype=np.intp))
+                if not len(current) or ids.iloc[0] > current[-1]:
+                    levels[level] = np.concatenate([current, ids.to_numpy()]) # Appended rows keep the order
+                else:
+                    levels[level] = np.union1d(current, ids.to_numpy())
+
+    def remove(self, frame, row_ids):
+        """Removes the given row ids from the levels frame holds for them."""
+        for col, levels in self.rows.items():
+            for level, ids in pd.Series(row_ids).groupby(frame[col].astype(str).to_numpy()):
+                levels[level] = np.setdiff1d(levels[level], ids.to_numpy(), assume_unique=True)
+
+
+# --- Count Cube ---
+CUBE_KEY_BITS = 21 # Bits per code in a packed (category, state, dimension) key
+CUBE_KEY_MASK = (1 << CUBE_KEY_BITS) - 1
+CUBE_DIMENSIONS = ['canonical_title', 'company_name', 'job_type_category'] # Counted per (category, state)
+CUBE_COLUMNS = ['category', 'state'] + CUBE_DIMENSIONS
+
+
+def levels_fit(levels, dimensions, filter_bits, level_bits):
+    """Whether every filter and dimension code of the levels fits its field of a packed key."""
+    return all(len(levels[col]) <= 1 << filter_bits for col in FILTER_COLUMNS) \
+        and all(len(levels[dim]) <= 1 << level_bits for dim in dimensions)
+
+
+class CountCube:
+    """Posting counts pre-aggregated by (category, state, dimension), sliced instead of rescanning rows.
+
+    Once the levels outgrow the packed key fields the cube is no longer complete and stops counting;
+    metrics are then counted from the rows with compute_row_metrics and row_region_summary.
+    """
+
+    def __init__(self, df, dimensions):
+        self.levels = {col: df[col].cat.categories for col in FILTER_COLUMNS + dimensions}
+        self.complete = True
+        self.tables = {dim: self._table(dim, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)) for dim in dimensions}
+        self.add(df)
+        for dim, table in self.tables.items():
+            logging.info(f"Built count cube for (category, state, {dim}) with {len(table['key'])} groups.")
+
+    def _table(self, dim, keys, counts):
+        """One cube table: sorted packed keys, their counts and the unpacked codes used for slicing."""
+        return {
+            'key': keys,
+            'count': counts,
+            'category': keys >> (2 * CUBE_KEY_BITS),
+            'state': (keys >> CUBE_KEY_BITS) & CUBE_KEY_MASK,
+            dim: keys & CUBE_KEY_MASK,
+        }
+
+    def copy(self):
+        """A cube sharing the tables; add replaces them rather than writing to them, so this one is unaffected."""
+        clone = copy.copy(self)
+        clone.tables = dict(self.tables)
+        return clone
+
+    def add(self, df, sign=1):
+        """Adds the postings in df to the counts, or removes them with sign=-1. Cost depends on df and the group count."""
+        self.levels = {col: df[col].cat.categories for col in self.levels} # Picks up levels appended by deltas
+        if self.complete and not levels_fit(self.levels, self.tables, CUBE_KEY_BITS, CUBE_KEY_BITS):
+            # Codes past their field would be counted for other groups, so nothing is counted any more
+            logging.warning("Too many levels for the count cube; metrics are counted from the rows instead.")
+            self.complete = False
+            self.tables = {dim: self._table(dim, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)) for dim in self.tables}
+        if not self.complete:
+            return
+        prefix = (df['category'].cat.codes.to_numpy().astype(np.int64) << (2 * CUBE_KEY_BITS)) \
+            | (df['state'].cat.codes.to_numpy().astype(np.int64) << CUBE_KEY_BITS)
+        for dim in self.tables:
+            # Pack the three codes into a single integer key and count each distinct key once
+            self._merge(dim, prefix | df[dim].cat.codes.to_numpy(), sign)
+
+    def _merge(self, dim, keys, sign):
+        """Adds (or with sign=-1 subtracts) one count per packed key to the table of dim.
+
+        Only the delta's keys are sorted; they are looked up in, or inserted into, the table's already
+        sorted keys, so a small delta does not re-sort a large table.
+        """
+        if not len(keys):
+            return
+        table = self.tables[dim]
+        keys, counts = np.unique(keys, return_counts=True)
+        positions = np.searchsorted(table['key'], keys)
+        found = positions < len(table['key'])
+        found[found] = table['key'][positions[found]] == keys[found]
+        merged = dict(table, count=table['count'].copy()) # The arrays of the old table are never written to
+        merged['count'][positions[found]] += sign * counts[found]
+        if not found.all():
+            added = self._table(dim, keys[~found], sign * counts[~found])
+            merged = {field: np.insert(values, positions[~found], added[field]) for field, values in merged.items()}
+        keep = merged['count'] > 0 # Drop groups that no longer have postings
+        if not keep.all():
+            merged = {field: values[keep] for field, values in merged.items()}
+        self.tables[dim] = merged
+
+    def _mask(self, table, selections):
+        """Boolean mask over the groups of one table matching the selected filter values."""
+        mask = np.ones(len(table['count']), dtype=bool)
+        for col, values in selections.items():
+            if values: # No values selected means "All"
+                codes = self.levels[col].get_indexer(values)
+                mask &= np.isin(table[col], codes[codes >= 0])
+        return mask
+
+    def _counts(self, table, column, mask):
+        """Postings per level of column over the masked groups, most frequent first, without empty levels."""
+        totals = np.bincount(table[column][mask], weights=table['count'][mask], minlength=len(self.levels[column]))
+        present = np.flatnonzero(totals)
+        counts = pd.Series(totals[present].astype(np.int64), index=self.levels[column][present].astype(str))
+        return counts.sort_values(ascending=False, kind="stable")
+
+    def aggregate(self, selections):
+        """Full count series per column for the selection, computing each table's mask only once."""
+        counts = {}
+        for dim, table in self.tables.items():
+            mask = self._mask(table, selections)
+            counts[dim] = self._counts(table, dim, mask)
+            if 'category' not in counts: # Category totals are the same in every table
+                counts['category'] = self._counts(table, 'category', mask)
+        return counts
+
+    def region_summary(self, selections, regions):
+        """Postings, top category and top company per region for the selection, most postings first.
+
+        regions maps state labels to the region they are shown in (such as a postal code on the map);
+        states missing from it are left out. Read from the company table, so several labels of one
+        region ("CA", "California") are merged before the top levels are picked.
+        """
+        table = self.tables['company_name']
+        mask = self._mask(table, selections)
+        codes = {col: table[col][mask] for col in ['state', 'category', 'company_name']}
+        return summarize_regions(self.levels, codes, table['count'][mask], regions)
+
+
+def summarize_regions(levels, codes, counts, regions):
+    """Postings, top category and top company per region, from the state, category and company codes of
+    groups (or rows) with the given counts. Levels are the categories the codes refer to."""
+    region_codes, region_levels = pd.factorize(regions.reindex(levels['state'].astype(str)).to_numpy())
+    region = np.asarray(region_codes, dtype=np.int64)[codes['state']]
+    known = region >= 0
+    region, counts = region[known], counts[known]
+    postings = np.bincount(region, weights=counts, minlength=len(region_levels)).astype(np.int64)
+    summary = pd.DataFrame({'postings': postings}, index=pd.Index(region_levels, dtype=object, name='region'))
+    summary = summary[summary['postings'] > 0]
+    for column, name in [('category', 'top_category'), ('company_name', 'top_company')]:
+        if not len(summary):
+            summary[name] = pd.Series(dtype=object)
+            continue
+        level_count = max(len(levels[column]), 1)
+        keys, inverse = np.unique(region * level_count + codes[column][known], return_inverse=True)
+        totals = np.bincount(inverse, weights=counts)
+        owners = keys // level_count
+        order = np.lexsort((-totals, owners)) # Largest total first within each region, ties in level order
+        first = order[np.r_[True, owners[order][1:] != owners[order][:-1]]]
+        top = pd.Series(levels[column][keys[first] % level_count].astype(str), index=region_levels[owners[first]])
+        summary[name] = top.reindex(summary.index)
+    return summary.sort_values('postings', ascending=False, kind="stable")
+
+
+def row_region_summary(frame, regions):
+    """region_summary over the rows of frame, for row sets the cube cannot slice such as search matches."""
+    columns = ['state', 'category', 'company_name']
+    levels = {col: frame[col].cat.categories for col in columns}
+    codes = {col: frame[col].cat.codes.to_numpy().astype(np.int64) for col in columns}
+    return summarize_regions(levels, codes, np.ones(len(frame), dtype=np.int64), regions)
+
+
+# --- Trend Rollups ---
+TREND_DAY_BITS = 16 # Days since 1970 in a packed key, enough until 2149
+TREND_FILTER_BITS = 10 # Bits per category and state code
+TREND_LEVEL_BITS = 63 - TREND_DAY_BITS - 2 * TREND_FILTER_BITS # Bits for the dimension code
+TREND_DIMENSIONS = ['canonical_title', 'company_name'] # Counted per (day, category, state)
+TREND_COLUMNS = ['category', 'state', 'posting_date'] + TREND_DIMENSIONS
+ROLLING_WINDOWS = {'Daily': 7, 'Weekly': 4} # Periods in the rolling average of each granularity
+
+
+def posting_days(dates):
+    """Days since 1970 of a datetime column, and a mask of the rows whose date fits the day field of a trend key."""
+    days = dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+    known = dates.notna().to_numpy() & (days >= 0) & (days < 1 << TREND_DAY_BITS)
+    return days, known
+
+
+class TrendRollup(CountCube):
+    """Daily posting counts by (day, category, state, dimension): the count cube with the posting day in the key.
+
+    Once the levels outgrow the packed key fields the rollup is no longer complete and stops counting;
+    trends are then counted from the rows with row_daily.
+    """
+
+    def __init__(self, df, dimensions):
+        self.levels = {col: df[col].cat.categories for col in FILTER_COLUMNS + dimensions}
+        self.complete = True
+        self.tables = {dim: self._table(dim, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)) for dim in dimensions}
+        self.add(df)
+        days = self.tables[dimensions[0]]['day']
+        logging.info(f"Built trend rollups over {len(np.unique(days))} days for {dimensions}.")
+
+    def _table(self, dim, keys, counts):
+        """One rollup table: sorted packed keys, their counts and the unpacked day and codes."""
+        level_mask = (1 << TREND_LEVEL_BITS) - 1
+        filter_mask = (1 << TREND_FILTER_BITS) - 1
+        return {
+            'key': keys,
+            'count': counts,
+            'day': keys >> (TREND_LEVEL_BITS + 2 * TREND_FILTER_BITS),
+            'category': (keys >> (TREND_LEVEL_BITS + TREND_FILTER_BITS)) & filter_mask,
+            'state': (keys >> TREND_LEVEL_BITS) & filter_mask,
+            dim: keys & level_mask,
+        }
+
+    def add(self, df, sign=1):
+        """Adds the dated postings in df to the daily counts, or removes them with sign=-1. Undated postings are skipped."""
+        self.levels = {col: df[col].cat.categories for col in self.levels}
+        if self.complete and not levels_fit(self.levels, self.tables, TREND_FILTER_BITS, TREND_LEVEL_BITS):
+            # Codes past their field would be counted for other groups, so nothing is counted any more
+            logging.warning("Too many category or state levels for the trend rollups; trends are counted from the rows instead.")
+            self.complete = False
+            self.tables = {dim: self._table(dim, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)) for dim in self.tables}
+        if not self.complete or 'posting_date' not in df.columns:
+            return
+        days, known = posting_days(df['posting_date'])
+        prefix = (days[known] << (TREND_LEVEL_BITS + 2 * TREND_FILTER_BITS)) \
+            | (df['category'].cat.codes.to_numpy()[known].astype(np.int64) << (TREND_LEVEL_BITS + TREND_FILTER_BITS)) \
+            | (df['state'].cat.codes.to_numpy()[known].astype(np.int64) << TREND_LEVEL_BITS)
+        for dim in self.tables:
+            self._merge(dim, prefix | df[dim].cat.codes.to_numpy()[known], sign)
+
+    def daily(self, selections, dimension=None, labels=()):
+        """Postings per day for the selection over the whole date range, zero-filled.
+
+        Without a dimension there is one 'Postings' column; with one, a column per requested label.
+        """
+        table = next(iter(self.tables.values())) if dimension is None else self.tables[dimension]
+        mask = self._mask(table, selections)
+        if dimension is not None:
+            positions = label_positions(self.levels[dimension], labels)
+            mask &= positions[table[dimension]] >= 0
+            groups = positions[table[dimension][mask]]
+            columns = list(labels)
+        else:
+            groups = np.zeros(mask.sum(), dtype=np.int64)
+            columns = ['Postings']
+        return daily_frame(table['day'], table['day'][mask], groups, table['count'][mask], columns)
+
+
+def label_positions(levels, labels):
+    """Position of each level in labels, -1 for levels not asked for."""
+    codes = levels.get_indexer(list(labels))
+    positions = np.full(len(levels), -1, dtype=np.int64)
+    positions[codes[codes >= 0]] = np.flatnonzero(codes >= 0)
+    return positions
+
+
+def daily_frame(all_days, days, groups, counts, columns):
+    """Day x column table of summed counts, spanning every day in all_days."""
+    if not len(all_days):
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='date'), dtype=np.int64)
+    first_day, day_count = int(all_days.min()), int(all_days.max() - all_days.min()) + 1
+    totals = np.bincount(groups * day_count + (days - first_day), weights=counts, minlength=len(columns) * day_count)
+    index = pd.date_range(pd.Timestamp(first_day, unit='D'), periods=day_count, freq='D', name='date')
+    return pd.DataFrame(totals.reshape(len(columns), day_count).T.astype(np.int64), index=index, columns=columns)
+
+
+def row_daily(df, rows, dimension=None, labels=()):
+    """Postings per day among the given row ids (None for all rows), for selections the rollups cannot slice."""
+    days, known = posting_days(df['posting_date'])
+    selected = np.flatnonzero(known) if rows is None else rows[known[rows]]
+    if dimension is not None:
+        groups = label_positions(df[dimension].cat.categories, labels)[df[dimension].cat.codes.to_numpy()[selected]]
+        selected, groups = selected[groups >= 0], groups[groups >= 0]
+        columns = list(labels)
+    else:
+        groups = np.zeros(len(selected), dtype=np.int64)
+        columns = ['Postings']
+    return daily_frame(days[known], days[selected], groups, np.ones(len(selected)), columns)
+
+
+def resample_trend(daily, granularity):
+    """Daily counts as they are, or summed into weeks starting on Monday."""
+    if granularity == 'Weekly':
+        return daily.resample('W-MON', label='left', closed='left').sum()
+    return daily
+
+
+def week_over_week(daily):
+    """Postings in the 7 days up to the latest date and in the 7 days before, for a one-column daily table."""
+    totals = daily.iloc[:, 0].to_numpy()
+    return int(totals[-7:].sum()), int(totals[-14:-7].sum())
+
+
+# --- Salary Sketches ---
+# DDSketch-style buckets: each spans a fixed ratio of salaries, so a quantile read as its bucket's representative
+# value is within SALARY_RELATIVE_ACCURACY of the exact one however many segments were merged
+SALARY_RELATIVE_ACCURACY = 0.01
+SALARY_GAMMA = (1 + SALARY_RELATIVE_ACCURACY) / (1 - SALARY_RELATIVE_ACCURACY) # Ratio between bucket bounds
+SALARY_BUCKET_BITS = 10 # Bucket index in a packed key; 1,024 buckets cover SALARY_ANNUAL_RANGE at 1%
+SALARY_FILTER_BITS = 10 # Bits per category and state code
+SALARY_LEVEL_BITS = 63 - SALARY_BUCKET_BITS - 2 * SALARY_FILTER_BITS # Bits for the dimension code
+SALARY_DIMENSIONS = ['canonical_title'] # Sketched per (category, state)
+SALARY_SKETCH_COLUMNS = ['category', 'state', 'annual_salary'] + SALARY_DIMENSIONS
+SALARY_QUANTILES = {'P10': 0.1, 'P25': 0.25, 'Median': 0.5, 'P75': 0.75, 'P90': 0.9}
+
+
+def salary_buckets(salaries):
+    """Sketch bucket of each annual salary, and a mask of the rows that have one."""
+    values = salaries.to_numpy(dtype=np.float64)
+    known = ~np.isnan(values)
+    buckets = np.zeros(len(values), dtype=np.int64)
+    buckets[known] = np.floor(np.log(values[known] / SALARY_ANNUAL_RANGE[0]) / np.log(SALARY_GAMMA))
+    return np.clip(buckets, 0, (1 << SALARY_BUCKET_BITS) - 1), known
+
+
+class SalarySketches(CountCube):
+    """Mergeable salary quantile sketches per (category, state, dimension): bucket counts in the count cube's layout.
+
+    Merging sketches is adding their bucket counts, so any filter combination and every delta costs the
+    groups it touches, never a sort of the raw salaries. Like the trend rollups, sketches whose levels outgrow
+    the packed key fields are no longer complete; quantiles then come from row_salary_quantiles.
+    """
+
+    def __init__(self, df, dimensions):
+        self.levels = {col: df[col].cat.categories for col in FILTER_COLUMNS + dimensions}
+        self.complete = True
+        self.tables = {dim: self._table(dim, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)) for dim in dimensions}
+        self.add(df)
+        salaries = int(self.tables[dimensions[0]]['count'].sum())
+        logging.info(f"Built salary sketches over {salaries} postings with a salary for {dimensions}.")
+
+    def _table(self, dim, keys, counts):
+        """One sketch table: sorted packed keys, their counts and the unpacked bucket and codes."""
+        level_mask = (1 << SALARY_LEVEL_BITS) - 1
+        filter_mask = (1 << SALARY_FILTER_BITS) - 1
+        return {
+            'key': keys,
+            'count': counts,
+            'bucket': keys >> (SALARY_LEVEL_BITS + 2 * SALARY_FILTER_BITS),
+            'category': (keys >> (SALARY_LEVEL_BITS + SALARY_FILTER_BITS)) & filter_mask,
+            'state': (keys >> SALARY_LEVEL_BITS) & filter_mask,
+            dim: keys & level_mask,
+        }
+
+    def add(self, df, sign=1):
+        """Adds the salaries in df to the sketches, or removes them with sign=-1. Postings without a salary are skipped."""
+        self.levels = {col: df[col].cat.categories for col in self.levels}
+        if self.complete and not levels_fit(self.levels, self.tables, SALARY_FILTER_BITS, SALARY_LEVEL_BITS):
+            logging.warning("Too many category or state levels for the salary sketches; quantiles are computed from the rows instead.")
+            self.complete = False
+            self.tables = {dim: self._table(dim, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)) for dim in self.tables}
+        if not self.complete or 'annual_salary' not in df.columns:
+            return
+        buckets, known = salary_buckets(df['annual_salary'])
+        prefix = (buckets[known] << (SALARY_LEVEL_BITS + 2 * SALARY_FILTER_BITS)) \
+            | (df['category'].cat.codes.to_numpy()[known].astype(np.int64) << (SALARY_LEVEL_BITS + SALARY_FILTER_BITS)) \
+            | (df['state'].cat.codes.to_numpy()[known].astype(np.int64) << SALARY_LEVEL_BITS)
+        for dim in self.tables:
+            self._merge(dim, prefix | df[dim].cat.codes.to_numpy()[known], sign)
+
+    def quantiles(self, selections, dimension=None, labels=()):
+        """SALARY_QUANTILES and the number of salaries of the selection, in one 'All' row or one row per requested label."""
+        table = next(iter(self.tables.values())) if dimension is None else self.tables[dimension]
+        mask = self._mask(table, selections)
+        if dimension is not None:
+            positions = label_positions(self.levels[dimension], labels)
+            mask &= positions[table[dimension]] >= 0
+            groups = positions[table[dimension][mask]]
+            index = list(labels)
+        else:
+            groups = np.zeros(mask.sum(), dtype=np.int64)
+            index = ['All']
+        return bucket_quantiles(table['bucket'][mask], groups, table['count'][mask], index)
+
+
+def bucket_quantiles(buckets, groups, counts, index):
+    """Quantiles per group of bucketed salaries, each read as the representative value of the bucket holding its rank."""
+    bucket_count = 1 << SALARY_BUCKET_BITS
+    histogram = np.bincount(groups * bucket_count + buckets, weights=counts, minlength=len(index) * bucket_count)
+    cumulative = histogram.reshape(len(index), bucket_count).cumsum(axis=1)
+    totals = cumulative[:, -1]
+    # The value between the bucket bounds with at most SALARY_RELATIVE_ACCURACY error to either of them
+    representatives = SALARY_ANNUAL_RANGE[0] * SALARY_GAMMA ** np.arange(bucket_count) * 2 * SALARY_GAMMA / (1 + SALARY_GAMMA)
+    quantiles = pd.DataFrame(index=pd.Index(index, dtype=object))
+    for name, q in SALARY_QUANTILES.items():
+        ranks = np.floor(q * np.maximum(totals - 1, 0))
+        positions = (cumulative > ranks[:, None]).argmax(axis=1)
+        quantiles[name] = np.where(totals > 0, representatives[positions], np.nan)
+    quantiles['salaries'] = totals.astype(np.int64)
+    return quantiles
+
+
+def row_salary_quantiles(df, rows, dimension=None, labels=()):
+    """Salary quantiles among the given row ids (None for all rows), for selections the sketches cannot slice."""
+    buckets, known = salary_buckets(df['annual_salary'])
+    selected = np.flatnonzero(known) if rows is None else rows[known[rows]]
+    if dimension is not None:
+        groups = label_positions(df[dimension].cat.categories, labels)[df[dimension].cat.codes.to_numpy()[selected]]
+        selected, groups = selected[groups >= 0], groups[groups >= 0]
+        index = list(labels)
+    else:
+        groups = np.zeros(len(selected), dtype=np.int64)
+        index = ['All']
+    return bucket_quantiles(buckets[selected], groups, np.ones(len(selected)), index)
+
+
+# --- Aggregation ---
+@dataclass(frozen=True)
+class DashboardMetrics:
+    """Every KPI and top-N table the page shows for one filter selection."""
+    total_postings: int
+    unique_categories: int
+    unique_titles: int
+    unique_companies: int
+    top_category: str
+    top_title: str
+    top_company: str
+    category_counts: pd.Series # Top TOP_N_CATEGORIES
+    title_counts: pd.Series # Top TOP_N_TITLES
+    company_counts: pd.Series # Top TOP_N_COMPANIES
+    job_type_counts: pd.Series # All job type labels present
+
+
+def top_label(counts):
+    """Most frequent label of a count series sorted in descending order, or "N/A" if it is empty."""
+    return counts.index[0] if not counts.empty else "N/A"
+
+
+def compute_dashboard_metrics(cube, selections):
+    """Computes all dashboard metrics for the selection in one aggregation stage over the count cube."""
+    return metrics_from_counts(cube.aggregate(selections))
+
+
+def level_counts(column, rows):
+    """Postings per level of a categorical column among the given row ids, most frequent first, without empty levels."""
+    codes = column.cat.codes.to_numpy()
+    totals = np.bincount(codes if rows is None else codes[rows], minlength=len(column.cat.categories))
+    present = np.flatnonzero(totals)
+    counts = pd.Series(totals[present].astype(np.int64), index=column.cat.categories[present].astype(str))
+    return counts.sort_values(ascending=False, kind="stable")
+
+
+def compute_row_metrics(df, rows):
+    """Computes all dashboard metrics from the codes of an arbitrary set of rows, e.g. search matches,
+    for selections the count cube cannot slice."""
+    return metrics_from_counts({col: level_counts(df[col], rows) for col in ['category'] + CUBE_DIMENSIONS})
+
+
+def metrics_from_counts(counts):
+    """Assembles the dashboard metrics from full count series per column."""
+    return DashboardMetrics(
+        total_postings=int(counts['category'].sum()),
+        unique_categories=len(counts['category']),
+        unique_titles=len(counts['canonical_title']),
+        unique_companies=len(counts['company_name']),
+        top_category=top_label(counts['category']),
+        top_title=top_label(counts['canonical_title']),
+        top_company=top_label(counts['company_name']),
+        category_counts=counts['category'].head(TOP_N_CATEGORIES),
+        title_counts=counts['canonical_title'].head(TOP_N_TITLES),
+        company_counts=counts['company_name'].head(TOP_N_COMPANIES),
+        job_type_counts=counts['job_type_category'],
+    )
+
+
+# --- Skills Extraction ---
+def load_skills():
+    """Returns the skills dictionary from SKILLS_PATH if present, otherwise SKILLS_LIST."""
+    try:
+        with open(SKILLS_PATH, "r", encoding="utf-8") as f:
+            skills = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        logging.info(f"Loaded {len(skills)} skills from {SKILLS_PATH}.")
+    except FileNotFoundError:
+        skills = SKILLS_LIST
+    return list(dict.fromkeys(skills)) # Drop duplicates, keep order
+
+
+def build_skills_pattern(skills):
+    """Compiles all skills into one case-insensitive regex, factored into a prefix trie so thousands of terms stay fast."""
+    trie = {}
+    for skill in skills:
+        node = trie
+        for char in skill.lower():
+            node = node.setdefault(char, {})
+        node[""] = {} # End of a skill
+
+    def to_regex(node):
+        branches = [re.escape(char) + to_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A skill ending here makes the rest optional; greedy matching still prefers the longer skill
+        return f"(?:{body})?" if "" in node else body
+
+    # Custom word boundaries so skills like "C++", "C#" and "Node.js" match as whole terms. The lookahead
+    # reports a match at every word start, so "Management" is still found inside "Project Management".
+    return re.compile(r"(?<!\w)(?=(" + to_regex(trie) + r")(?!\w))", re.IGNORECASE)
+
+
+class SkillMatrix:
+    """Sparse posting x skill incidence matrix, built with a single regex scan over each description."""
+
+    def __init__(self, descriptions, skills):
+        self.skills = pd.Index(skills)
+        self._pattern = build_skills_pattern(skills)
+        self._lookup = {skill.lower(): i for i, skill in enumerate(skills)}
+        self.matrix = self._extract(descriptions)
+        self.totals = self.counts(None)
+        logging.info(f"Extracted {len(skills)} skills: {self.matrix.nnz} posting-skill pairs in {len(descriptions)} postings.")
+
+    def _extract(self, descriptions):
+        """Incidence matrix rows for the given descriptions (which must have a default RangeIndex)."""
+        matches = descriptions.str.findall(self._pattern).explode().dropna()
+        rows = matches.index.to_numpy()
+        cols = matches.str.lower().map(self._lookup).to_numpy()
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int8), (rows, cols)),
+            shape=(len(descriptions), len(self.skills)),
+        )
+        matrix.sum_duplicates()
+        matrix.data[:] = 1 # A skill counts once per posting, however often it is mentioned
+        return matrix
+
+    def copy(self):
+        """A matrix sharing the incidence rows; append stacks them into a new matrix, so this one is unaffected."""
+        return copy.copy(self)
+
+    def append(self, descriptions):
+        """Scans only the new descriptions and stacks their rows under the existing matrix."""
+        self.matrix = sparse.vstack([self.matrix, self._extract(descriptions.reset_index(drop=True))], format="csr")
+        self.totals = None
+        self.totals = self.counts(None)
+
+    def counts(self, rows):
+        """Postings mentioning each skill among the given row ids (None for all rows), most frequent first."""
+        if rows is None and getattr(self, "totals", None) is not None:
+            return self.totals
+        selected = self.matrix if rows is None else self.matrix[rows]
+        totals = np.asarray(selected.sum(axis=0, dtype=np.int64)).ravel()
+        present = np.flatnonzero(totals)
+        counts = pd.Series(totals[present], index=self.skills[present])
+        return counts.sort_values(ascending=False, kind="stable")
+
+    def cooccurrence(self, rows):
+        """Sparse skill x skill matrix of postings mentioning both skills; the diagonal holds single-skill counts."""
+        selected = self.matrix if rows is None else self.matrix[rows]
+        selected = selected.astype(np.int32) # Widen before the product so pair counts cannot overflow
+        return (selected.T @ selected).tocsr()
+
+
+def data_fingerprint(df):
+    """Content hash of everything the aggregates depend on, identical for identical data in any process."""
+    # Categorical columns hash their levels once and then only the codes, so this stays cheap
+    columns = FILTER_COLUMNS + CUBE_DIMENSIONS + ['posting_hash']
+    row_hashes = pd.util.hash_pandas_object(df[columns], index=False)
+    return hashlib.sha256(row_hashes.to_numpy().tobytes()).hexdigest()
+
+
+@dataclass(frozen=True)
+class DataState:
+    """One version of the postings and every structure built over them. Never modified once published, so a
+    session that took it keeps reading rows, indexes and aggregates that agree while a delta is merged."""
+    df: pd.DataFrame
+    version: str # Identifies this state of the data in per-filter cache keys
+    fingerprint: str
+    row_index: RowIndex
+    cube: CountCube
+    skills: SkillMatrix
+    search: SearchIndex
+    duplicates: DuplicateIndex # Reposts of the same job are counted once in the unique-postings view
+    unique_cube: CountCube
+    trends: TrendRollup # Daily counts for the trend charts; data without posting dates gets empty rollups
+    unique_trends: TrendRollup
+    salaries: SalarySketches # Salary quantile sketches; data without salaries gets empty sketches
+    unique_salaries: SalarySketches
+    posting_rows: pd.Series # Row of the latest occurrence of each posting hash, to recognise repeated or changed postings
+
+
+class DeltaRejected(ValueError):
+    """A delta file that cannot be merged as it is; it is skipped until it is rewritten."""
+
+
+class JobData:
+    """The current DataState, built once at load time and shared by all sessions, and the merging of delta files into it."""
+
+    def __init__(self, df):
+        # Titles are counted in their canonical form; only titles the saved mapping has not seen are processed
+        self.titles = TitleMapping.load(TITLE_MAPPING_PATH)
+        df['canonical_title'] = self.titles.canonicalize(df['job_title'])
+        self.titles.save(TITLE_MAPPING_PATH)
+        fingerprint = data_fingerprint(df)
+        duplicates = DuplicateIndex.load_or_build(df, fingerprint, DUPLICATES_PATH)
+        trend_columns = [col for col in TREND_COLUMNS if col in df.columns]
+        salary_columns = [col for col in SALARY_SKETCH_COLUMNS if col in df.columns]
+        hashes = df['posting_hash']
+        latest = ~hashes.duplicated(keep="last").to_numpy()
+        self.state = DataState(
+            df=df,
+            version=uuid.uuid4().hex,
+            fingerprint=fingerprint,
+            row_index=RowIndex(df, FILTER_COLUMNS),
+            cube=CountCube(df, CUBE_DIMENSIONS),
+            skills=SkillMatrix(df['job_description'], load_skills()),
+            search=SearchIndex.load_or_build(df, fingerprint, SEARCH_INDEX_PATH),
+            duplicates=duplicates,
+            unique_cube=CountCube(df[CUBE_COLUMNS].take(duplicates.unique_rows), CUBE_DIMENSIONS),
+            trends=TrendRollup(df[trend_columns], TREND_DIMENSIONS),
+            unique_trends=TrendRollup(df[trend_columns].take(duplicates.unique_rows), TREND_DIMENSIONS),
+            salaries=SalarySketches(df[salary_columns], SALARY_DIMENSIONS),
+            unique_salaries=SalarySketches(df[salary_columns].take(duplicates.unique_rows), SALARY_DIMENSIONS),
+            posting_rows=pd.Series(np.flatnonzero(latest), index=hashes.to_numpy()[latest]),
+        )
+        self.applied_deltas = set()
+        self.last_delta_check = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        """Merges delta files from DELTA_DIR that have not been applied yet. Returns (new, changed) posting counts."""
+        if not force and time.monotonic() - self.last_delta_check < DELTA_POLL_SECONDS:
+            return 0, 0
+        with self._lock: # One session applies deltas while the others keep reading the current state
+            self.last_delta_check = time.monotonic()
+            try:
+                entries = sorted(os.scandir(DELTA_DIR), key=lambda entry: entry.name)
+            except FileNotFoundError:
+                return 0, 0
+            added = changed = 0
+            for entry in entries:
+                if not entry.name.endswith(".csv"):
+                    continue
+                # A rewritten file is applied again; the posting hashes make that idempotent
+                delta_id = (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                if delta_id in self.applied_deltas:
+                    continue
+                try:
+                    delta = clean_data(pd.read_csv(entry.path))
+                    # New postings of an undated delta count as posted the day their delta file was written
+                    posted_on = pd.Timestamp(entry.stat().st_mtime, unit='s').normalize()
+                    delta_added, delta_changed = self.apply_delta(delta, posted_on)
+                except DeltaRejected as e:
+                    logging.error(f"Rejected delta file {entry.path}: {e}")
+                    self.applied_deltas.add(delta_id) # Retrying it on every poll would fail the same way
+                    continue
+                except Exception as e:
+                    logging.exception(f"Could not apply delta file {entry.path}: {e}")
+                    continue
+                self.applied_deltas.add(delta_id)
+                added += delta_added
+                changed += delta_changed
+                logging.info(f"Applied delta {entry.name}: {delta_added} new, {delta_changed} changed postings.")
+            return added, changed
+
+    def apply_delta(self, delta, posted_on=None):
+        """Merges cleaned delta rows, updating copies of the indexes, cube and skill matrix by the delta only.
+
+        Fields the delta does not carry keep their current values; new postings of a delta without dates get posted_on.
+        New postings need every dimension and text column, a delta leaving one out is rejected with DeltaRejected.
+
+        The current state is left as it is and replaced in a single assignment at the end, so sessions reading it
+        are unaffected and a failure midway publishes nothing.
+        """
+        state = self.state
+        delta = delta.drop_duplicates('posting_hash', keep="last").reset_index(drop=True)
+        if 'job_title' in delta.columns:
+            delta['canonical_title'] = self.titles.canonicalize(delta['job_title'])
+            self.titles.save(TITLE_MAPPING_PATH)
+        positions = state.posting_rows.reindex(delta['posting_hash'].to_numpy()).to_numpy()
+        is_new = np.isnan(positions)
+        columns = [col for col in state.df.columns if col in delta.columns]
+
+        # Known postings only count as changed if one of the fields the delta carries differs
+        updated = delta.loc[~is_new, columns].reset_index(drop=True)
+        updated_rows = positions[~is_new].astype(np.intp)
+        previous = state.df.iloc[updated_rows].reset_index(drop=True)
+        previous_values, updated_values = previous[columns].astype(str), updated.astype(str)
+        differs = (previous_values.ne(updated_values) & ~(previous_values.isna() & updated_values.isna())).any(axis=1).to_numpy()
+        updated = updated[differs].reset_index(drop=True)
+        updated_rows = updated_rows[differs]
+        previous = previous[differs].reset_index(drop=True)
+        new = delta.loc[is_new, columns].reset_index(drop=True)
+        if new.empty and updated.empty:
+            return 0, 0
+        missing = [col for col in DIMENSION_COLUMNS + TEXT_COLUMNS if col in state.df.columns and col not in delta.columns]
+        if len(new) and missing:
+            raise DeltaRejected(f"{len(new)} new postings lack the {', '.join(missing)} column(s); only changes to known postings may leave columns out")
+        if posted_on is not None and 'posting_date' in state.df.columns and 'posting_date' not in new.columns:
+            new['posting_date'] = posted_on
+
+        df = append_rows(state.df, new)
+        first_row = len(state.df)
+        new_rows = np.arange(first_row, len(df))
+        new = df.iloc[first_row:].reset_index(drop=True) # With every column and the levels of df
+        previous = align_categories(previous, df)
+        changes = align_categories(updated, df)
+        updated = previous.copy() # Fields the delta does not carry, such as the date of an undated posting, are kept
+        for col in columns:
+            updated[col] = changes[col]
+            # df is a fresh frame that no session has seen yet, so it can be modified in place
+            df.loc[updated_rows, col] = changes[col].to_numpy()
+
+        row_index = state.row_index.copy()
+        row_index.remove(previous, updated_rows)
+        row_index.add(updated, updated_rows)
+        row_index.add(new, new_rows)
+        cube, trends, salaries = state.cube.copy(), state.trends.copy(), state.salaries.copy()
+        for aggregate in (cube, trends, salaries):
+            aggregate.add(previous, sign=-1)
+            aggregate.add(updated)
+            aggregate.add(new)
+        skills, search, duplicates = state.skills.copy(), state.search.copy(), state.duplicates.copy()
+        if len(new):
+            skills.append(new['job_description']) # Changed postings keep their description
+            search.append(new['job_title'], new['job_description'], first_row=first_row) # Their title too
+            duplicates.append(new['job_description'], first_row=first_row) # And their duplicate cluster
+        unique_updated = duplicates.duplicate_of[updated_rows] == updated_rows
+        unique_new = duplicates.duplicate_of[new_rows] == new_rows
+        unique_cube, unique_trends, unique_salaries = state.unique_cube.copy(), state.unique_trends.copy(), state.unique_salaries.copy()
+        for unique_aggregate in (unique_cube, unique_trends, unique_salaries):
+            unique_aggregate.add(previous[unique_updated], sign=-1)
+            unique_aggregate.add(updated[unique_updated])
+            unique_aggregate.add(new[unique_new])
+        self.state = DataState(
+            df=df,
+            version=uuid.uuid4().hex, # Invalidates every per-filter cache entry
+            fingerprint=data_fingerprint(df),
+            row_index=row_index,
+            cube=cube,
+            skills=skills,
+            search=search,
+            duplicates=duplicates,
+            unique_cube=unique_cube,
+            trends=trends,
+            unique_trends=unique_trends,
+            salaries=salaries,
+            unique_salaries=unique_salaries,
+            posting_rows=pd.concat([state.posting_rows, pd.Series(new_rows, index=new['posting_hash'].to_numpy())]),
+        )
+        return len(new), len(updated)
+
+
+# --- Data Filtering ---
+def filter_data(dataf, row_index, categories, states, search_rows=None, unique_rows=None):
+    """Filters the DataFrame to the selected categories and states, and to the sorted search_rows and
+    unique_rows if given, by intersecting precomputed row sets."""
+    rows = row_index.select({'category': categories, 'state': states})
+    for allowed in (search_rows, unique_rows):
+        if allowed is not None:
+            rows = allowed if rows is None else np.intersect1d(rows, allowed, assume_unique=True)
+    # No copy when nothing is filtered; otherwise only the matching rows are gathered.
+    # The original row ids are kept as the index of the result.
+    filtered_df = dataf if rows is None else dataf.take(rows)
+    searched = f", Search matches: {len(search_rows)}" if search_rows is not None else ""
+    searched += ", Unique postings only" if unique_rows is not None else ""
+    logging.info(f"Data filtered. Categories: {categories or 'All'}, States: {states or 'All'}{searched}. Filtered rows: {len(filtered_df)}")
+    return filtered_df
+
+
+# --- Raw Data Explorer ---
+TEXT_PREVIEW_CHARS = 160 # Long text is cut to this many characters in explorer pages
+
+
+def sort_rows(df, rows, column, ascending=True):
+    """Row ids of the selection (None for all rows) ordered by column. Ties keep their row order."""
+    if rows is None:
+        rows = np.arange(len(df))
+    values = df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Sort by each level's rank in label order: small integers instead of strings, and correct
+        # even though deltas append new levels after the sorted ones
+        ranks = np.empty(len(values.cat.categories), dtype=np.int64)
+        ranks[np.argsort(values.cat.categories.to_numpy(dtype=str), kind="stable")] = np.arange(len(ranks))
+        keys = ranks[values.cat.codes.to_numpy()[rows]]
+    else:
+        keys = values.to_numpy()[rows]
+    order = pd.Series(keys).sort_values(ascending=ascending, kind="stable").index.to_numpy()
+    return rows[order]
+
+
+def explorer_page(df, row_ids, columns, preview_chars=TEXT_PREVIEW_CHARS):
+    """The given rows and columns only, with long text cut short. The index holds the row ids."""
+    page = df[columns].take(row_ids)
+    for col in TEXT_COLUMNS:
+        if col in page.columns:
+            text = page[col]
+            page[col] = text.str.slice(0, preview_chars).where(text.str.len() <= preview_chars, text.str.slice(0, preview_chars - 1) + "…")
+    return page
+
+
+# --- Precomputed Results ---
+# KPIs and top-N tables for every single (category, state) filter pair, written by precompute.py
+RESULTS_PATH = os.environ.get("JOBS_RESULTS_PATH", os.path.join(SNAPSHOT_DIR, "results.parquet"))
+RESULTS_VERSION = 1 # Bump whenever the stored fields change
+ALL_VALUES = "" # Stands for "All" (an empty selection) in the results file
+RESULT_SCALARS = ['total_postings', 'unique_categories', 'unique_titles', 'unique_companies']
+RESULT_SERIES = ['category_counts', 'title_counts', 'company_counts', 'job_type_counts', 'skill_counts']
+
+_precompute_state = None # (cube, row_index, skills) inside a precompute worker
+
+
+def results_meta_path(path):
+    """Path of the metadata file stored next to a results file."""
+    return os.path.splitext(path)[0] + ".meta.json"
+
+
+def results_settings():
+    """Settings the stored results depend on besides the data itself."""
+    return {
+        "version": RESULTS_VERSION,
+        "top_n": [TOP_N_CATEGORIES, TOP_N_TITLES, TOP_N_COMPANIES, TOP_N_SKILLS],
+        "skills": hashlib.sha256("\n".join(load_skills()).encode()).hexdigest(),
+    }
+
+
+def init_precompute_worker(cube, row_index, skills, frame=None):
+    """Receives the shared aggregates, and the rows to count from if the cube is incomplete, once per worker process."""
+    global _precompute_state
+    _precompute_state = (cube, row_index, skills, frame)
+
+
+def precompute_category(category, states):
+    """Result rows for one category (ALL_VALUES for all) paired with every state and with all states."""
+    cube, row_index, skills, frame = _precompute_state
+    frames = []
+    for state in [ALL_VALUES] + states:
+        selections = {'category': [category] if category else [], 'state': [state] if state else []}
+        rows = row_index.select(selections)
+        metrics = compute_dashboard_metrics(cube, selections) if frame is None else compute_row_metrics(frame, rows)
+        if not metrics.total_postings:
+            continue # The dashboard stops before using any results for an empty selection
+        series = {field: getattr(metrics, field) for field in RESULT_SERIES if field != 'skill_counts'}
+        series['skill_counts'] = skills.counts(rows).head(TOP_N_SKILLS)
+        labels = [ALL_VALUES] * len(RESULT_SCALARS)
+        values = [getattr(metrics, field) for field in RESULT_SCALARS]
+        fields = list(RESULT_SCALARS)
+        for field, counts in series.items():
+            labels.extend(counts.index)
+            values.extend(counts.to_numpy())
+            fields.extend([field] * len(counts))
+        frames.append(pd.DataFrame({
+            'category': category, 'state': state, 'field': fields, 'label': labels,
+            'count': np.asarray(values, dtype=np.int64),
+        }))
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+
+def precompute_results(data, workers=INGEST_WORKERS):
+    """Computes the results for every (category, state) pair, one category per task, in worker processes."""
+    categories = [ALL_VALUES] + sorted(data.df['category'].cat.categories)
+    states = sorted(data.df['state'].cat.categories)
+    # A cube whose levels outgrew its keys no longer counts; the metrics are then counted from these columns
+    frame = None if data.cube.complete else data.df[['category'] + CUBE_DIMENSIONS]
+    shared = (data.cube, data.row_index, data.skills, frame)
+    workers = max(1, min(workers, len(categories)))
+    if workers == 1:
+        init_precompute_worker(*shared)
+        frames = [precompute_category(category, states) for category in categories]
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=init_precompute_worker, initargs=shared) as pool:
+            frames = list(pool.map(precompute_category, categories, [states] * len(categories)))
+    results = pd.concat([frame for frame in frames if frame is not None], ignore_index=True)
+    for col in ['category', 'state', 'field', 'label']:
+        results[col] = results[col].astype('category') # Dictionary-encoded in the parquet file as well
+    logging.info(f"Precomputed {results.groupby(['category', 'state'], observed=True).ngroups} filter pairs "
+                 f"using {workers} worker processes.")
+    return results
+
+
+def write_results(results, fingerprint, path=RESULTS_PATH):
+    """Atomically writes the results and the data fingerprint they were computed from."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    results.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    meta_path = results_meta_path(path)
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({**results_settings(), "fingerprint": fingerprint}, f, indent=2)
+    os.replace(meta_path + ".tmp", meta_path)
+    logging.info(f"Saved {len(results)} precomputed result rows to {path}.")
+
+
+def read_results(fingerprint, path=RESULTS_PATH):
+    """Reads the precomputed results for the data with this fingerprint. Returns None if there are none."""
+    try:
+        with open(results_meta_path(path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta != {**results_settings(), "fingerprint": fingerprint}:
+        logging.info(f"Precomputed results at {path} are for other data or settings, ignoring them.")
+        return None
+    try:
+        return PrecomputedResults(pd.read_parquet(path))
+    except Exception as e:
+        logging.warning(f"Could not read precomputed results at {path}: {e}")
+        return None
+
+
+class PrecomputedResults:
+    """Precomputed metrics and skill counts, served for selections of at most one category and one state."""
+
+    def __init__(self, results):
+        self.results = results
+        self.positions = results.groupby(['category', 'state'], observed=True).indices
+        logging.info(f"Loaded precomputed results for {len(self.positions)} filter pairs.")
+
+    def lookup(self, selections):
+        """Returns (metrics, top skill counts) for the selection, or None if it was not precomputed."""
+        if any(len(values) > 1 for values in selections.values()):
+            return None
+        key = tuple(values[0] if values else ALL_VALUES for values in (selections['category'], selections['state']))
+        if key not in self.positions:
+            return None
+        rows = self.results.iloc[self.positions[key]]
+        fields = rows['field'].to_numpy()
+        scalars = rows[np.isin(fields, RESULT_SCALARS)]
+        scalars = dict(zip(scalars['field'].astype(str), scalars['count'].to_numpy()))
+        series = {}
+        for field in RESULT_SERIES:
+            part = rows[fields == field] # Stored most frequent first
+            series[field] = pd.Series(part['count'].to_numpy(), index=part['label'].astype(str).to_numpy())
+
+        metrics = DashboardMetrics(
+            **{field: int(scalars[field]) for field in RESULT_SCALARS},
+            top_category=top_label(series['category_counts']),
+            top_title=top_label(series['title_counts']),
+            top_company=top_label(series['company_counts']),
+            **{field: series[field] for field in RESULT_SERIES if field != 'skill_counts'},
+        )
+        return metrics, series['skill_counts']
@@ -1,19 +1,77 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from collections import Counter
+import plotly.graph_objects as go
+from plotly.colors import sequential
 import logging
-from io import StringIO
 import base64
+import hashlib
+import html
+import io
 import requests
-import os # Keep os import if needed elsewhere, though not used in provided snippet
+import numpy as np
+from scipy import sparse
+import os
+import time
+from PIL import Image
+from analytics import (
+    DATA_SOURCE,
+    ROLLING_WINDOWS,
+    RESULTS_PATH,
+    SALARY_RELATIVE_ACCURACY,
+    TEXT_PREVIEW_CHARS,
+    TOP_N_CATEGORIES,
+    TOP_N_COMPANIES,
+    TOP_N_SKILLS,
+    TOP_N_TITLES,
+    JobData,
+    compute_dashboard_metrics,
+    compute_row_metrics,
+    explorer_page,
+    filter_data,
+    load_source,
+    read_results,
+    read_snapshot,
+    read_snapshot_meta,
+    resample_trend,
+    row_daily,
+    row_region_summary,
+    row_salary_quantiles,
+    sort_rows,
+    week_over_week,
+)
+from charts import (
+    FigureCache,
+    build_bar_figure,
+    build_line_figure,
+    build_salary_box_figure,
+    build_state_map,
+    get_dashboard_template,
+)
+from export import EXPORT_FORMATS, start_export
+from geo import STATE_SHAPES_PATH, load_state_shapes, state_codes
+from insights import build_insights
+from profiling import PROFILE_MEMORY, RunProfile
 
 # --- Constants ---
-TOP_N_CATEGORIES = 15
-TOP_N_TITLES = 10
-TOP_N_COMPANIES = 10
-TOP_N_SKILLS = 10 # Still defined but used in commented section
+TOP_N_SKILL_PAIRS = 10
+TOP_N_TREND_TITLES = 5 # Top titles of the selection drawn as separate trend lines
+TOP_N_SALARY_TITLES = 10 # Top titles of the selection drawn as salary boxes, below the whole selection
+FIGURE_CACHE_MAX_BYTES = 32 * 1024 * 1024 # Serialized size budget for cached chart figures
+EXPLORER_PAGE_SIZES = [25, 50, 100, 250] # Rows per page offered in the raw data explorer
 LOGO_PATH = "indeed_logo.png" # Make sure this path is correct relative to your script
+LOGO_DISPLAY_WIDTH = 180 # Width of the logo on the page in CSS pixels, see .logo below
+# Served by Streamlit at app/static/ (server.enableStaticServing in .streamlit/config.toml)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+# Finished exports, downloaded straight from disk so large files are never held in server memory
+EXPORT_DIR = os.path.join(STATIC_DIR, "exports")
+EXPORT_POLL_SECONDS = 1 # How often the progress of a running export is refreshed
+STATIC_FILE_MAX_BYTES = 200 * 1024 * 1024 # Largest file Streamlit serves from app/static/
+# Inline briefcase icon, so the page needs no icon font from a CDN
+BRIEFCASE_ICON = (
+    '<svg class="icon" viewBox="0 0 24 24" fill="currentColor" fill-rule="evenodd" aria-hidden="true">'
+    '<path d="M9 3h6a2 2 0 0 1 2 2v2h3a2 2 0 0 1 2 2v10a2 2 0 0 1-2 2H4a2 2 0 0 1-2-2V9a2 2 0 0 1 2-2h3V5a2 2 0 0 1 2-2z'
+    'M9 5v2h6V5z"/></svg>'
+)
 
 # --- Setup Logging ---
 logging.basicConfig(
@@ -23,12 +81,8 @@ logging.basicConfig(
 )
 
 # --- Custom CSS for Enhanced Appearance ---
-# Includes Font Awesome CDN
 custom_css = """
 <style>
-    /* Import Font Awesome */
-    @import url('https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.4/css/all.min.css');
-
     body {
         background-color: #121212; /* Dark background */
         color: #ffffff; /* White text */
@@ -254,9 +308,10 @@ custom_css = """
         border-bottom: none; /* Remove the default h2 border here */
     }
 
-    .summary-container h2 i { /* Icon styling */
+    .summary-container h2 .icon { /* Icon styling */
         margin-right: 12px;
-        font-size: 1em; /* Match text size */
+        width: 1em; /* Match text size */
+        height: 1em;
         color: #a855f7; /* Match heading color */
     }
 
@@ -376,38 +431,25 @@ custom_css = """
 st.markdown(custom_css, unsafe_allow_html=True)
 
 # --- Data Loading ---
-@st.cache_data
 def load_data():
-    """Loads data from a Google Drive CSV link with error handling."""
+    """Loads data from the local snapshot, revalidated against DATA_SOURCE, with error handling."""
+    meta = read_snapshot_meta()
     try:
-        # Use the direct download link (ensure it remains valid)
-        drive_url = "https://drive.google.com/uc?export=download&id=17jcNGGMozYXj-MJtYhqhpJqVATeOQGQ7"
-        logging.info(f"Attempting to download data from: {drive_url}")
-
-        response = requests.get(drive_url, timeout=30) # Added timeout
-        response.raise_for_status() # Raises HTTPError for bad responses (4XX, 5XX)
-
-        # Use StringIO to convert the response content into a file-like object
-        csv_data = StringIO(response.text)
-        df = pd.read_csv(csv_data)
-        logging.info(f"Successfully loaded CSV. Shape: {df.shape}")
-
-        # --- Basic Data Cleaning (Optional but Recommended) ---
-        # Example: Convert relevant columns to string to avoid type errors later
-        for col in ['category', 'state', 'job_title', 'company_name', 'job_description', 'job_type']:
-            if col in df.columns:
-                df[col] = df[col].astype(str).fillna('Unknown') # Fill NA and ensure string type
-        logging.info("Performed basic data cleaning (astype str, fillna).")
-
-        return df
+        return load_source(meta)
 
     except requests.exceptions.RequestException as e:
-        error_message = f"Network error downloading file from Google Drive: {e}"
+        error_message = f"Network error downloading data from {DATA_SOURCE}: {e}"
+        # Keep the dashboard up on the last good snapshot while the source is unreachable
+        df = read_snapshot() if meta else None
+        if df is not None:
+            st.warning(f"{error_message}. Showing data from the last successful download.")
+            logging.warning(f"{error_message}. Falling back to local snapshot.")
+            return df
         st.error(error_message)
         logging.error(error_message)
         st.stop()
     except pd.errors.EmptyDataError:
-        error_message = "The downloaded CSV file is empty."
+        error_message = "The CSV data is empty."
         st.error(error_message)
         logging.error(error_message)
         st.stop()
@@ -417,9 +459,41 @@ def load_data():
         logging.exception(error_message) # Log full traceback
         st.stop()
 
-df = load_data()
+
+# Shared across sessions and reruns without copying; nothing downstream may modify data.df in place
+@st.cache_resource(show_spinner="Loading job postings...")
+def load_job_data():
+    """Loads the cleaned data once per process and builds the row index, count cube and skill matrix over it."""
+    return JobData(load_data())
+
+
+@st.cache_resource(show_spinner=False)
+def load_precomputed_results(fingerprint, results_mtime):
+    """Precomputed per-filter results for this data, re-read whenever precompute.py rewrites the file."""
+    return read_results(fingerprint)
+
+
+# --- Run Profiling ---
+# Measures every section of this run; shown in the sidebar diagnostics panel and logged as JSON
+profile = RunProfile()
+profile.section("data_load")
+
+job_data = load_job_data()
+new_postings, changed_postings = job_data.refresh()
+if new_postings or changed_postings:
+    st.toast(f"Data refreshed: {new_postings:,} new and {changed_postings:,} changed postings.")
+# Taken once, so the whole run reads one version of the data even if another session merges a delta meanwhile
+data = job_data.state
+df = data.df
+try:
+    results_mtime = os.stat(RESULTS_PATH).st_mtime_ns
+except OSError:
+    results_mtime = None
+precomputed_results = load_precomputed_results(data.fingerprint, results_mtime) if results_mtime else None
+profile.set_rows(len(df))
 
 # --- Page Title ---
+profile.section("header")
 st.title("Job Market Demand Analysis")
 st.markdown("""
 Welcome! This dashboard provides insights into the job market using data scraped from job postings.
@@ -428,107 +502,188 @@ Explore trends in job categories, titles, companies, and more. Use the filters i
 
 
 # --- Add Logo ---
-def get_base64_of_file(path):
-    """Reads a file and returns its base64 encoded string."""
+@st.cache_resource(show_spinner=False)
+def get_logo_url(path):
+    """Encodes a right-sized copy of the logo once per process and returns the URL to show it from."""
     try:
-        with open(path, "rb") as f:
-            encoded_image = base64.b64encode(f.read()).decode()
-        return f"data:image/png;base64,{encoded_image}"
+        with Image.open(path) as image:
+            # Twice the display width keeps the logo sharp on high-density screens
+            width = LOGO_DISPLAY_WIDTH * 2
+            image = image.convert("RGBA").resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format="WEBP", quality=85, method=6)
     except FileNotFoundError:
         logging.warning(f"Logo file not found at: {path}. Skipping logo display.")
         return None
     except Exception as e:
         logging.error(f"Error reading logo file: {e}")
         return None
+    encoded = buffer.getvalue()
+    logging.info(f"Encoded logo {path}: {os.path.getsize(path):,} bytes down to {len(encoded):,} bytes.")
+
+    if st.get_option("server.enableStaticServing"):
+        # The content hash in the name makes the URL change with the logo, so browsers can keep it cached
+        name = f"logo.{hashlib.sha256(encoded).hexdigest()[:12]}.webp"
+        try:
+            if not os.path.exists(os.path.join(STATIC_DIR, name)):
+                os.makedirs(STATIC_DIR, exist_ok=True)
+                with open(os.path.join(STATIC_DIR, name + ".tmp"), "wb") as f:
+                    f.write(encoded)
+                os.replace(os.path.join(STATIC_DIR, name + ".tmp"), os.path.join(STATIC_DIR, name))
+            return f"app/static/{name}"
+        except OSError as e:
+            logging.warning(f"Could not write logo to {STATIC_DIR}, inlining it instead: {e}")
+    # Without static serving the small encoded copy is inlined instead
+    return f"data:image/webp;base64,{base64.b64encode(encoded).decode()}"
 
 # IMPORTANT: Ensure 'indeed_logo.png' is in the same directory as your script,
 # or provide the correct relative/absolute path.
-logo_base64 = get_base64_of_file(LOGO_PATH)
-if logo_base64:
+logo_url = get_logo_url(LOGO_PATH)
+if logo_url:
     st.markdown(
         f"""
         <div style="display: flex; justify-content: center;">
-            <img class="logo" src="{logo_base64}" alt="Indeed Logo">
+            <img class="logo" src="{logo_url}" width="{LOGO_DISPLAY_WIDTH}" alt="Indeed Logo">
         </div>
         """,
         unsafe_allow_html=True
     )
 
 # --- Sidebar for Filters ---
+profile.section("filters")
 st.sidebar.header("Filters")
 
-# Category Filter
-all_categories = sorted(df['category'].unique())
-# Try setting a default like 'IT' if it exists, otherwise default to 'All'
-default_cat_index = 0
-if "All" not in all_categories:
-      all_categories_with_all = ["All"] + all_categories
-else:
-      all_categories_with_all = all_categories # If 'All' somehow exists
+# Full-text Search
+search_query = st.sidebar.text_input(
+    "Search postings",
+    placeholder='e.g. python "data analyst"',
+    help="Matches postings whose title or description contains every word; quote words to match them as a phrase.",
+).strip()
 
-try:
-    default_cat_index = all_categories_with_all.index("IT")
-except ValueError:
-    default_cat_index = 0 # Default to "All" if "IT" isn't found
-
-selected_category = st.sidebar.selectbox(
-    "Select Job Category",
-    options=all_categories_with_all,
-    index=default_cat_index # Set default index
+# Category Filter
+all_categories = sorted(df['category'].cat.categories) # Delta levels are appended unsorted
+# Try setting a default like 'IT' if it exists, otherwise default to 'All' (empty selection)
+default_categories = ["IT"] if "IT" in all_categories else []
+
+selected_categories = st.sidebar.multiselect(
+    "Select Job Categories",
+    options=all_categories,
+    default=default_categories,
+    placeholder="All"
 )
 
 # Location (State) Filter
-all_states = sorted(df['state'].unique())
-if "All" not in all_states:
-      all_states_with_all = ["All"] + all_states
-else:
-    all_states_with_all = all_states
+all_states = sorted(df['state'].cat.categories)
 
-selected_state = st.sidebar.selectbox(
-    "Select a State",
-    options=all_states_with_all,
-    index=0 # Default to "All"
+selected_states = st.sidebar.multiselect(
+    "Select States",
+    options=all_states,
+    default=[], # Default to "All"
+    placeholder="All"
 )
 
+# Near-duplicate Filter
+unique_only = st.sidebar.toggle(
+    "Unique postings only",
+    value=False,
+    help="Count reposts of the same job (near-identical descriptions) once, by their earliest posting.",
+)
+
+selected_category = ", ".join(selected_categories) or "All"
+selected_state = ", ".join(selected_states) or "All"
+
+# Diagnostics Panel
+show_diagnostics = st.sidebar.toggle(
+    "Show diagnostics",
+    value=False,
+    help="Time, CPU and memory used by each section of the page on this run.",
+)
+diagnostics_panel = st.sidebar.container() # Filled in at the end of the run, once every section is measured
+
+
+def render_diagnostics(profile):
+    """Finishes the run profile and shows it in the sidebar if diagnostics are enabled."""
+    total_ms = profile.finish()
+    if not show_diagnostics:
+        return
+    with diagnostics_panel:
+        st.markdown("#### Diagnostics")
+        st.dataframe(
+            profile.to_frame(),
+            hide_index=True,
+            column_config={
+                'Wall (ms)': st.column_config.NumberColumn(format="%.1f"),
+                'CPU (ms)': st.column_config.NumberColumn(format="%.1f"),
+                'Peak (MB)': st.column_config.NumberColumn(format="%.2f"),
+            },
+        )
+        st.caption(f"Run {profile.run_id}: {total_ms:,.0f} ms in total.")
+        if not PROFILE_MEMORY:
+            st.caption("Set JOBS_PROFILE_MEMORY=1 to record peak memory per section.")
+
 
 # --- Data Filtering ---
-def filter_data(dataf, category, state):
-    """Filters the DataFrame based on selected category and state."""
-    filtered_df = dataf.copy()
-    if category != "All":
-        filtered_df = filtered_df[filtered_df['category'] == category]
-    if state != "All":
-        filtered_df = filtered_df[filtered_df['state'] == state]
-    logging.info(f"Data filtered. Category: {category}, State: {state}. Filtered rows: {len(filtered_df)}")
-    return filtered_df
-
-filtered_df = filter_data(df, selected_category, selected_state)
+@st.cache_data(max_entries=64, show_spinner=False)
+def search_postings(_data, query, version):
+    """Row ids matching the query, best match first, cached per query and state of the data."""
+    return _data.search.search(query, _data.df)[0]
+
+
+# Search matches in relevance order, None without a query
+ranked_rows = search_postings(data, search_query, data.version) if search_query else None
+filtered_df = filter_data(
+    df, data.row_index, selected_categories, selected_states,
+    search_rows=None if ranked_rows is None else np.sort(ranked_rows),
+    unique_rows=data.duplicates.unique_rows if unique_only else None,
+)
+# Row ids of the selection for the row-level engines, None when nothing is filtered out
+selected_rows = None if len(filtered_df) == len(df) else filtered_df.index.to_numpy()
+profile.set_rows(len(filtered_df))
 
 # --- Display Filtered Results Info ---
-st.markdown(f"#### Showing results for: **{selected_category}** jobs in **{selected_state}**")
+results_title = f"#### Showing results for: **{selected_category}** jobs in **{selected_state}**"
+if search_query:
+    results_title += f" matching **{search_query}**"
+st.markdown(results_title)
+if unique_only:
+    st.caption(f"{len(df) - len(data.duplicates.unique_rows):,} near-duplicate postings are hidden across the whole dataset.")
 
 # --- Check if Filtered Data is Empty ---
 if filtered_df.empty:
     st.warning("No job postings match the selected filters. Please broaden your search.")
+    render_diagnostics(profile)
     st.stop() # Stop execution if no data after filtering
 
 # --- KPIs ---
+profile.section("kpis")
 st.header("Key Performance Indicators")
 st.markdown("At a glance metrics based on the current data selection.")
 
-# Calculate KPIs safely after checking filtered_df is not empty
-total_postings = len(filtered_df)
-unique_categories = filtered_df['category'].nunique() # This KPI is not displayed but calculated
-unique_titles_count = filtered_df['job_title'].nunique()
-
-# Use value_counts() and handle potential empty series
-top_category = filtered_df['category'].value_counts().index[0] if not filtered_df['category'].value_counts().empty else "N/A"
-top_title = filtered_df['job_title'].value_counts().index[0] if not filtered_df['job_title'].value_counts().empty else "N/A"
+# Serve the metrics precomputed for this filter pair if there are any, otherwise calculate
+# every metric for the page in one pass over the count cube
+selections = {'category': selected_categories, 'state': selected_states}
+filter_key = (data.version, tuple(selected_categories), tuple(selected_states), search_query, unique_only)
+# Results are precomputed for all postings only, without search
+precomputed = precomputed_results.lookup(selections) if precomputed_results and not (search_query or unique_only) else None
+if precomputed:
+    metrics, skill_counts = precomputed
+else:
+    cube = data.unique_cube if unique_only else data.cube
+    if search_query or not cube.complete:
+        # Search matches are an arbitrary row set, which the cube cannot slice; nor can a cube that stopped counting
+        metrics = compute_row_metrics(df, selected_rows)
+    else:
+        metrics = compute_dashboard_metrics(cube, selections)
+    # Column sums over the selected rows of the skill matrix built at load time
+    skill_counts = data.skills.counts(selected_rows).head(TOP_N_SKILLS)
+profile.set_rows(metrics.total_postings)
+top_category = metrics.top_category
+top_title = metrics.top_title
 
 
 kpi_data = [
-    {"label": "Total Job Postings", "value": f"{total_postings:,}", "color": "gradient-blue-purple"},
-    {"label": "Unique Job Titles", "value": f"{unique_titles_count:,}", "color": "gradient-purple-pink"}, # Changed KPI
+    {"label": "Total Job Postings", "value": f"{metrics.total_postings:,}", "color": "gradient-blue-purple"},
+    {"label": "Unique Job Titles", "value": f"{metrics.unique_titles:,}", "color": "gradient-purple-pink"}, # Changed KPI
     {"label": "Top Job Category", "value": top_category.upper() if top_category == "IT" else top_category, "color": "gradient-red-orange"},
 ]
 
@@ -549,272 +704,523 @@ st.markdown(
 )
 
 
-# --- Common Plotly Layout ---
-def get_plotly_layout():
-    """Returns a dictionary for common Plotly layout settings."""
-    return {
-        'paper_bgcolor': 'rgba(0,0,0,0)', # Transparent paper
-        'plot_bgcolor': 'rgba(0,0,0,0)',  # Transparent plot area
-        'font_color': '#ffffff',          # White font color
-        'title_font_size': 20,            # Slightly smaller title
-        'font': dict(family='Inter', size=12), # Match body font
-        'xaxis': dict(showgrid=False, zeroline=False, color='#ccc'), # Cleaner axes, light gray color
-        'yaxis': dict(showgrid=True, gridcolor='#444', color='#ccc'), # Subtle gridlines on y-axis, light gray color
-        'legend': dict(bgcolor='rgba(0,0,0,0.5)', bordercolor='#888', font=dict(color='#ccc')), # Semi-transparent legend with light gray font
-        'margin': dict(l=20, r=20, t=50, b=20), # Adjust margins for better fit
-         'hoverlabel': dict(bgcolor="black", font_size=12, font_family="Inter", font_color="#fff"), # Dark hover label
-         'hovermode': 'closest' # Improve hover behavior
-    }
+# --- Figure Building ---
+@st.cache_resource
+def get_figure_cache():
+    """Process-wide figure cache shared by all sessions."""
+    return FigureCache(FIGURE_CACHE_MAX_BYTES)
+
 
+figure_cache = get_figure_cache()
 
 # --- Job Postings by Category ---
+profile.section("category_chart")
 st.header("Job Postings Distribution by Category")
 st.markdown(f"Distribution across the top {TOP_N_CATEGORIES} categories based on the current filters.")
 
-category_counts = filtered_df['category'].value_counts().head(TOP_N_CATEGORIES)
+category_counts = metrics.category_counts
 if not category_counts.empty:
-    fig_category_bar = px.bar(
-        category_counts,
-        x=category_counts.index,
-        y=category_counts.values,
-        labels={'x': 'Job Category', 'y': 'Number of Postings'},
-        title=f"Top {TOP_N_CATEGORIES} Job Categories", # Dynamic title part removed for simplicity, covered by intro markdown
-        color_discrete_sequence=px.colors.sequential.Plasma_r, # Reversed Plasma
-        template="plotly_dark" # Use plotly dark template base
-    )
-    fig_category_bar.update_layout(**get_plotly_layout()) # Apply common layout
-    fig_category_bar.update_layout(xaxis_tickangle=-45) # Angle category names if long
+    def build_category_bar():
+        fig = build_bar_figure(
+            category_counts,
+            title=f"Top {TOP_N_CATEGORIES} Job Categories", # Dynamic title part removed for simplicity, covered by intro markdown
+            label_title='Job Category',
+            value_title='Number of Postings',
+            color=sequential.Plasma_r[0], # Reversed Plasma
+        )
+        fig.update_layout(xaxis_tickangle=-45) # Angle category names if long
+        return fig
+
+    fig_category_bar = figure_cache.get_or_build((filter_key, 'category_bar'), build_category_bar)
     st.plotly_chart(fig_category_bar, use_container_width=True)
 else:
     st.info("No category data to display for the current selection.")
 
 # --- Top Job Titles ---
+profile.section("title_chart")
 st.header("Top Job Titles")
-st.markdown(f"The most frequent job titles found in the current data selection (Top {TOP_N_TITLES}).")
+st.markdown(
+    f"The most frequent job titles found in the current data selection (Top {TOP_N_TITLES}). "
+    "Variants of a title (seniority, location, abbreviations) are counted together."
+)
 
-job_title_counts = filtered_df['job_title'].value_counts().head(TOP_N_TITLES)
+job_title_counts = metrics.title_counts
 if not job_title_counts.empty:
-    fig_job_title_bar = px.bar(
-        job_title_counts,
-        y=job_title_counts.index,
-        x=job_title_counts.values,
-        orientation='h',
-        labels={'y': 'Job Title', 'x': 'Number of Postings'},
-        title=f"Top {TOP_N_TITLES} Job Titles", # Dynamic title part removed
-        color=job_title_counts.values, # Color by count
-        color_continuous_scale=px.colors.sequential.Viridis, # Use Viridis scale
-        template="plotly_dark"
-    )
-    fig_job_title_bar.update_layout(**get_plotly_layout())
-    fig_job_title_bar.update_layout(yaxis={'categoryorder':'total ascending'}) # Order bars
+    def build_job_title_bar():
+        fig = build_bar_figure(
+            job_title_counts,
+            title=f"Top {TOP_N_TITLES} Job Titles", # Dynamic title part removed
+            label_title='Job Title',
+            value_title='Number of Postings',
+            horizontal=True,
+            colorscale=sequential.Viridis, # Color by count
+        )
+        fig.update_layout(yaxis={'categoryorder':'total ascending'}) # Order bars
+        return fig
+
+    fig_job_title_bar = figure_cache.get_or_build((filter_key, 'job_title_bar'), build_job_title_bar)
     st.plotly_chart(fig_job_title_bar, use_container_width=True)
 else:
     st.info("No job title data to display for the current selection.")
 
 
 # --- Top Companies ---
+profile.section("company_chart")
 st.header("Top Hiring Companies")
 st.markdown(f"Companies with the highest number of job postings in the current data selection (Top {TOP_N_COMPANIES}).")
 
-company_counts = filtered_df['company_name'].value_counts().head(TOP_N_COMPANIES)
+company_counts = metrics.company_counts
 if not company_counts.empty:
-    fig_company_bar = px.bar(
-        company_counts,
-        y=company_counts.index,
-        x=company_counts.values,
-        orientation='h',
-        labels={'y': 'Company Name', 'x': 'Number of Postings'},
-        title=f"Top {TOP_N_COMPANIES} Companies", # Dynamic title part removed
-        color=company_counts.values,
-        color_continuous_scale=px.colors.sequential.Tealgrn, # Changed color sequence
-        template="plotly_dark"
-    )
-    fig_company_bar.update_layout(**get_plotly_layout())
-    fig_company_bar.update_layout(yaxis={'categoryorder':'total ascending'})
+    def build_company_bar():
+        fig = build_bar_figure(
+            company_counts,
+            title=f"Top {TOP_N_COMPANIES} Companies", # Dynamic title part removed
+            label_title='Company Name',
+            value_title='Number of Postings',
+            horizontal=True,
+            colorscale=sequential.Tealgrn, # Changed color sequence
+        )
+        fig.update_layout(yaxis={'categoryorder':'total ascending'})
+        return fig
+
+    fig_company_bar = figure_cache.get_or_build((filter_key, 'company_bar'), build_company_bar)
     st.plotly_chart(fig_company_bar, use_container_width=True)
 else:
     st.info("No company data to display for the current selection.")
 
 
-# # --- Skills Demand Analysis ---
-# # Kept commented out as requested
-# # st.header("Skills in Demand")
-# # st.markdown("Analyzing the skills mentioned in job descriptions.")
-
-# # Define skills list (consider making this configurable or loading from a file)
-# # SKILLS_LIST = [
-# #     "Python", "JavaScript", "Java", "C++", "C#", "SQL", "NoSQL", "AWS", "Azure", "GCP",
-# #     "Docker", "Kubernetes", "Terraform", "React", "Angular", "Vue", "Node.js",
-# #     "Data Analysis", "Machine Learning", "Deep Learning", "AI", "Statistics", "Pandas", "NumPy", "Scikit-learn",
-# #     "Communication", "Leadership", "Management", "Project Management", "Agile", "Scrum"
-# # ]
-
-# # def extract_skills(description):
-# #     """Extracts predefined skills from a job description (case-insensitive)."""
-# #     if not isinstance(description, str):
-# #         return []
-# #     # Use word boundaries (\b) to avoid matching substrings (e.g., 'java' in 'javascript')
-# #     found_skills = [skill for skill in SKILLS_LIST if pd.Series(description.lower()).str.contains(fr'\b{skill.lower()}\b', regex=True).any()]
-# #     return found_skills
-
-# # # Check if 'job_description' column exists
-# # if 'job_description' in filtered_df.columns:
-# #     try:
-# #         # Apply skill extraction to the FILTERED dataframe
-# #         filtered_df['skills'] = filtered_df['job_description'].apply(extract_skills)
-# #         logging.info("Skill extraction completed.")
-
-# #         # Flatten the list of skills
-# #         all_skills = [skill for sublist in filtered_df['skills'] for skill in sublist]
-
-# #         if all_skills:
-# #             skill_counts = Counter(all_skills)
-# #             top_skills = skill_counts.most_common(TOP_N_SKILLS)
-
-# #             skills_df = pd.DataFrame(top_skills, columns=['Skill', 'Count'])
-
-# #             fig_skills_bar = px.bar(
-# #                 skills_df,
-# #                 x='Count',
-# #                 y='Skill',
-# #                 orientation='h',
-# #                 labels={'Count': 'Frequency in Postings', 'Skill': 'Skill'},
-# #                 title=f"Top {TOP_N_SKILLS} Skills Mentioned", # Dynamic title part removed
-# #                 color='Count',
-# #                 color_continuous_scale=px.colors.sequential.Magenta, # Different color scale
-# #                 template="plotly_dark"
-# #             )
-# #             fig_skills_bar.update_layout(**get_plotly_layout())
-# #             fig_skills_bar.update_layout(yaxis={'categoryorder':'total ascending'})
-# #             st.plotly_chart(fig_skills_bar, use_container_width=True)
-# #         else:
-# #             st.info("No predefined skills found in the job descriptions for the current selection.")
-
-# #     except Exception as e:
-# #         st.error(f"An error occurred during skills analysis: {e}")
-# #         logging.exception("Error during skills analysis")
-# # else:
-# #     st.warning("The 'job_description' column is missing. Cannot perform skills analysis.")
-# #     logging.warning("'job_description' column not found for skills analysis.")
-
-
-# # --- Job Type Analysis ---
-# # Kept commented out as requested
-# # st.header("Job Type Distribution")
-# # st.markdown("Distribution of job types (e.g., Full-time, Part-time) in the data.")
-
-# # if 'job_type' in filtered_df.columns:
-# #     # Simplified job type categorization
-# #     def categorize_job_type(jt):
-# #         jt_lower = str(jt).lower()
-# #         if 'full-time' in jt_lower or 'full time' in jt_lower:
-# #             return 'Full-time'
-# #         elif 'part-time' in jt_lower or 'part time' in jt_lower:
-# #             return 'Part-time'
-# #         elif 'contract' in jt_lower:
-# #             return 'Contract'
-# #         elif 'internship' in jt_lower:
-# #             return 'Internship'
-# #         elif 'temporary' in jt_lower:
-# #             return 'Temporary'
-# #         else:
-# #             return 'Other/Unspecified' # Catch-all
-
-# #     filtered_df['job_type_category'] = filtered_df['job_type'].apply(categorize_job_type)
-
-# #     job_type_counts = filtered_df['job_type_category'].value_counts()
-
-# #     if not job_type_counts.empty:
-# #         fig_job_type_pie = px.pie(
-# #             job_type_counts,
-# #             names=job_type_counts.index,
-# #             values=job_type_counts.values,
-# #             title=f"Job Type Distribution", # Dynamic title part removed
-# #             hole=0.3, # Make it a donut chart
-# #             color_discrete_sequence=px.colors.sequential.RdBu, # Changed color sequence
-# #             template="plotly_dark"
-# #         )
-# #         fig_job_type_pie.update_traces(
-# #             textposition='outside',
-# #             textinfo='percent+label',
-# #             pull=[0.05 if i == 0 else 0 for i in range(len(job_type_counts))], # Pull the largest slice
-# #             marker=dict(line=dict(color='#1f1f1f', width=2))
-# #         )
-# #         fig_job_type_pie.update_layout(**get_plotly_layout())
-# #         fig_job_type_pie.update_layout(showlegend=False, title_font_size=20) # Hide legend for pie
-
-# #         # Display chart and metrics side-by-side
-# #         col1, col2 = st.columns([2, 1]) # Chart takes more space
-
-# #         with col1:
-# #             st.plotly_chart(fig_job_type_pie, use_container_width=True)
-
-# #         with col2:
-# #             st.markdown("#### Breakdown:")
-# #             total = job_type_counts.sum()
-# #             for job_type, count in job_type_counts.items():
-# #                 percentage = (count / total) * 100 if total > 0 else 0
-# #                 st.metric(label=job_type, value=f"{count:,}", delta=f"{percentage:.1f}%")
-# #             # Add a note about the categorization
-# #             st.caption("Note: Job types are broadly categorized (Full-time, Part-time, Contract, etc.). 'Other' includes unspecified or less common types.")
-
-# #     else:
-# #         st.info("No job type data to display for the current selection.")
-# # else:
-# #     st.warning("'job_type' column not found. Cannot perform job type analysis.")
-# #     logging.warning("'job_type' column not found for job type analysis.")
+# --- Skills Demand Analysis ---
+profile.section("skills_chart")
+st.header("Skills in Demand")
+st.markdown(f"Skills most often mentioned in the job descriptions of the current data selection (Top {TOP_N_SKILLS}).")
+
+if not skill_counts.empty:
+    def build_skills_bar():
+        fig = build_bar_figure(
+            skill_counts,
+            title=f"Top {TOP_N_SKILLS} Skills Mentioned", # Dynamic title part removed
+            label_title='Skill',
+            value_title='Frequency in Postings',
+            horizontal=True,
+            colorscale=sequential.Magenta, # Different color scale
+        )
+        fig.update_layout(yaxis={'categoryorder':'total ascending'})
+        return fig
+
+    fig_skills_bar = figure_cache.get_or_build((filter_key, 'skills_bar'), build_skills_bar)
+    st.plotly_chart(fig_skills_bar, use_container_width=True)
+else:
+    st.info("No predefined skills found in the job descriptions for the current selection.")
+
+
+# --- Skill Co-occurrence ---
+@st.cache_data(max_entries=64, show_spinner=False)
+def compute_skill_cooccurrence(_skills, _rows, filter_key):
+    """Top skill pairs and a top-skill heatmap matrix for the selection, cached per filter key."""
+    cooccurrence = _skills.cooccurrence(_rows)
+
+    # Each unordered pair once: strictly above the diagonal
+    pairs = sparse.triu(cooccurrence, k=1).tocoo()
+    top = np.argsort(-pairs.data, kind="stable")[:TOP_N_SKILL_PAIRS]
+    single_counts = cooccurrence.diagonal()
+    top_pairs = pd.DataFrame({
+        'Skill A': _skills.skills[pairs.row[top]],
+        'Skill B': _skills.skills[pairs.col[top]],
+        'Postings with Both': pairs.data[top],
+        # Share of the postings mentioning the rarer skill that also mention the other one
+        'Overlap': pairs.data[top] / np.minimum(single_counts[pairs.row[top]], single_counts[pairs.col[top]]),
+    })
+
+    top_skills = np.argsort(-single_counts, kind="stable")[:TOP_N_SKILLS]
+    top_skills = top_skills[single_counts[top_skills] > 0]
+    heatmap = cooccurrence[top_skills][:, top_skills].toarray().astype(float)
+    np.fill_diagonal(heatmap, np.nan) # Single-skill counts would dominate the color scale
+    labels = _skills.skills[top_skills]
+    return top_pairs, pd.DataFrame(heatmap, index=labels, columns=labels)
+
+
+profile.section("skill_pairs_chart")
+st.header("Skills Requested Together")
+st.markdown("Pairs of skills that appear in the same job descriptions for the current data selection.")
+
+top_pairs, cooccurrence_heatmap = compute_skill_cooccurrence(data.skills, selected_rows, filter_key)
+if not top_pairs.empty:
+    def build_cooccurrence_heatmap():
+        fig = go.Figure(
+            go.Heatmap(
+                z=cooccurrence_heatmap.to_numpy(),
+                x=cooccurrence_heatmap.columns.tolist(),
+                y=cooccurrence_heatmap.index.tolist(),
+                colorscale=sequential.Magenta,
+                hovertemplate="%{y} + %{x}: %{z} postings<extra></extra>",
+            ),
+            layout=dict(template=get_dashboard_template(), title=dict(text=f"Co-occurrence of the Top {TOP_N_SKILLS} Skills")),
+        )
+        fig.update_layout(xaxis_tickangle=-45, yaxis={'autorange': 'reversed'})
+        return fig
+
+    col1, col2 = st.columns([3, 2]) # Heatmap takes more space
+    with col1:
+        fig_cooccurrence = figure_cache.get_or_build((filter_key, 'skills_heatmap'), build_cooccurrence_heatmap)
+        st.plotly_chart(fig_cooccurrence, use_container_width=True)
+    with col2:
+        st.markdown(f"#### Top {TOP_N_SKILL_PAIRS} Skill Pairs")
+        st.dataframe(
+            top_pairs,
+            hide_index=True,
+            column_config={'Overlap': st.column_config.ProgressColumn(format="percent", min_value=0, max_value=1)},
+        )
+else:
+    st.info("No skill pairs found in the job descriptions for the current selection.")
+
+
+# --- Job Type Analysis ---
+profile.section("job_type_chart")
+st.header("Job Type Distribution")
+st.markdown("Distribution of job types (e.g., Full-time, Part-time) in the data.")
+
+# Job types are normalized at ingest, so this only reads counts from the cube
+job_type_counts = metrics.job_type_counts
+if not job_type_counts.empty:
+    def build_job_type_pie():
+        fig = go.Figure(
+            go.Pie(
+                labels=job_type_counts.index.tolist(),
+                values=job_type_counts.to_numpy(),
+                hole=0.3, # Make it a donut chart
+                marker=dict(colors=sequential.RdBu, line=dict(color='#1f1f1f', width=2)), # Changed color sequence
+                textposition='outside',
+                textinfo='percent+label',
+                pull=[0.05 if i == 0 else 0 for i in range(len(job_type_counts))], # Pull the largest slice
+                sort=False, # Already sorted by count
+            ),
+            layout=dict(template=get_dashboard_template(), title=dict(text="Job Type Distribution")),
+        )
+        fig.update_layout(showlegend=False, title_font_size=20) # Hide legend for pie
+        return fig
+
+    # Display chart and metrics side-by-side
+    col1, col2 = st.columns([2, 1]) # Chart takes more space
+
+    with col1:
+        fig_job_type_pie = figure_cache.get_or_build((filter_key, 'job_type_pie'), build_job_type_pie)
+        st.plotly_chart(fig_job_type_pie, use_container_width=True)
+
+    with col2:
+        st.markdown("#### Breakdown:")
+        total = job_type_counts.sum()
+        for job_type, count in job_type_counts.items():
+            percentage = (count / total) * 100 if total > 0 else 0
+            st.metric(label=job_type, value=f"{count:,}", delta=f"{percentage:.1f}%")
+        # Add a note about the categorization
+        st.caption("Note: Job types are broadly categorized (Full-time, Part-time, Contract, etc.). 'Other' includes unspecified or less common types.")
+
+else:
+    st.info("No job type data to display for the current selection.")
+
+
+# --- Salary Analysis ---
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_salary_quantiles(_data, _rows, filter_key, selections, search_active, unique, dimension=None, labels=()):
+    """Salary quantiles for the selection, per label of dimension if given, merged from the sketches once per filter key."""
+    sketches = _data.unique_salaries if unique else _data.salaries
+    if search_active or not sketches.complete:
+        # Search matches are an arbitrary row set the sketches cannot slice, and sketches that outgrew their keys are empty
+        return row_salary_quantiles(_data.df, _rows, dimension, labels)
+    return sketches.quantiles(selections, dimension, labels)
+
+
+profile.section("salaries")
+st.header("Salary Analysis")
+st.markdown("Annualized pay of the postings that state one, with ranges counted at their midpoint and hourly or monthly rates scaled to a year.")
+
+if 'annual_salary' not in df.columns or not df['annual_salary'].notna().any():
+    st.info("The loaded data has no salary information, so there is no pay to show.")
+else:
+    salary_args = (data, selected_rows, filter_key, selections, bool(search_query), unique_only)
+    salary_quantiles = get_salary_quantiles(*salary_args)
+    overall = salary_quantiles.loc['All']
+    if not overall['salaries']:
+        st.info("None of the postings in the current selection state a salary.")
+    else:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Median Salary", f"${overall['Median']:,.0f}")
+        col2.metric("25th Percentile", f"${overall['P25']:,.0f}")
+        col3.metric("75th Percentile", f"${overall['P75']:,.0f}")
+
+        salary_titles = tuple(metrics.title_counts.index[:TOP_N_SALARY_TITLES])
+        title_quantiles = get_salary_quantiles(*salary_args, dimension='canonical_title', labels=salary_titles)
+
+        def build_salary_box():
+            quantiles = pd.concat([salary_quantiles.rename(index={'All': 'All Selected Postings'}), title_quantiles])
+            return build_salary_box_figure(quantiles, "Annual Salary by Job Title", color=sequential.Tealgrn[-1])
+
+        fig_salary_box = figure_cache.get_or_build((filter_key, 'salary_box'), build_salary_box)
+        st.plotly_chart(fig_salary_box, use_container_width=True)
+        st.caption(
+            f"Boxes span the 25th to 75th percentile with the median inside, whiskers the 10th to 90th. "
+            f"{int(overall['salaries']):,} of {metrics.total_postings:,} postings state a salary. "
+            f"Values are merged from quantile sketches and are accurate to within {SALARY_RELATIVE_ACCURACY:.0%}."
+        )
+
+
+# --- Job Postings by State ---
+@st.cache_resource(show_spinner=False)
+def get_state_shapes_url(path):
+    """Publishes the state boundaries as a static file once per process and returns its URL, or None without static serving."""
+    if not st.get_option("server.enableStaticServing"):
+        return None
+    with open(path, "rb") as f:
+        content = f.read()
+    # Content-hashed like the logo, so browsers fetch the boundaries once instead of with every map figure
+    name = f"us_states.{hashlib.sha256(content).hexdigest()[:12]}.geojson"
+    try:
+        if not os.path.exists(os.path.join(STATIC_DIR, name)):
+            os.makedirs(STATIC_DIR, exist_ok=True)
+            with open(os.path.join(STATIC_DIR, name + ".tmp"), "wb") as f:
+                f.write(content)
+            os.replace(os.path.join(STATIC_DIR, name + ".tmp"), os.path.join(STATIC_DIR, name))
+        return f"app/static/{name}"
+    except OSError as e:
+        logging.warning(f"Could not write state boundaries to {STATIC_DIR}, inlining them in the map instead: {e}")
+        return None
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_state_summary(_data, _search_rows, map_key, categories, unique):
+    """Per-state summary for the category filter, and postings per state label that is not on the map, once per map key."""
+    labels = _data.df['state'].cat.categories
+    regions = state_codes(labels, load_state_shapes())
+    unmapped = regions[regions.isna()]
+    unmapped = pd.Series(unmapped.index, index=unmapped.index) # Each label is its own region
+    cube = _data.unique_cube if unique else _data.cube
+    if _search_rows is not None or not cube.complete:
+        # Search matches are an arbitrary row set, which the cube cannot slice; nor can a cube that stopped counting
+        frame = filter_data(
+            _data.df[['category', 'state', 'company_name']], _data.row_index, categories, [],
+            search_rows=_search_rows, unique_rows=_data.duplicates.unique_rows if unique else None,
+        )
+        return row_region_summary(frame, regions), row_region_summary(frame, unmapped)['postings']
+    selection = {'category': categories}
+    return cube.region_summary(selection, regions), cube.region_summary(selection, unmapped)['postings']
+
+
+profile.section("state_map")
+st.header("Job Postings by State")
+st.markdown("Where the postings of the selected categories are, with each state's top category and employer on hover.")
+
+# The map always shows every state, so it depends on the category filter but not on the state filter
+map_key = (data.version, tuple(selected_categories), search_query, unique_only)
+state_summary, unmapped_postings = get_state_summary(
+    data, None if ranked_rows is None else np.sort(ranked_rows), map_key, tuple(selected_categories), unique_only,
+)
+profile.set_rows(len(state_summary))
+if not state_summary.empty:
+    def build_state_choropleth():
+        return build_state_map(
+            state_summary, load_state_shapes(), f"Job Postings by State: {selected_category}", colorscale=sequential.Plasma,
+            shapes_url=get_state_shapes_url(STATE_SHAPES_PATH),
+        )
+
+    fig_state_map = figure_cache.get_or_build((map_key, 'state_map'), build_state_choropleth)
+    st.plotly_chart(fig_state_map, use_container_width=True)
+else:
+    st.info("None of the postings in the current selection are located in a US state.")
+if not unmapped_postings.empty:
+    st.caption("Not on the map: " + ", ".join(f"{label} ({count:,})" for label, count in unmapped_postings.items()) + ".")
+
+
+# --- Posting Trends ---
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_daily_trend(_data, _rows, filter_key, selections, search_active, unique, dimension=None, labels=()):
+    """Postings per day for the selection, per label of dimension if given, read from the rollups once per filter key."""
+    rollup = _data.unique_trends if unique else _data.trends
+    if search_active or not rollup.complete:
+        # Search matches are an arbitrary row set the rollups cannot slice, and a rollup that outgrew its keys has no counts
+        return row_daily(_data.df, _rows, dimension, labels)
+    return rollup.daily(selections, dimension, labels)
+
+
+profile.section("trends")
+st.header("Posting Trends")
+st.markdown("How many postings went up over time for the current selection, from daily rollups kept up to date at ingest.")
+
+if 'posting_date' not in df.columns or not df['posting_date'].notna().any():
+    st.info("The loaded data has no posting dates, so there are no trends to show.")
+else:
+    granularity = st.radio("Granularity", list(ROLLING_WINDOWS), index=1, horizontal=True)
+    rolling_window = ROLLING_WINDOWS[granularity]
+    trend_args = (data, selected_rows, filter_key, selections, bool(search_query), unique_only)
+    daily_trend = get_daily_trend(*trend_args)
+
+    # Week-over-week change over the last 7 days of data
+    last_week, previous_week = week_over_week(daily_trend)
+    change = f"{(last_week - previous_week) / previous_week:+.1%}" if previous_week else "n/a"
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Postings in the last 7 days", f"{last_week:,}", delta=f"{last_week - previous_week:+,} week over week")
+    col2.metric("Previous 7 days", f"{previous_week:,}")
+    col3.metric("Week-over-week change", change)
+
+    def build_trend_line():
+        trend = resample_trend(daily_trend, granularity)
+        return build_line_figure(trend, f"{granularity} Postings", 'Number of Postings', rolling_window=rolling_window)
+
+    fig_trend = figure_cache.get_or_build((filter_key, 'trend', granularity), build_trend_line)
+    st.plotly_chart(fig_trend, use_container_width=True)
+    st.caption(f"The dashed line is the {rolling_window}-{'day' if granularity == 'Daily' else 'week'} rolling average.")
+
+    trend_titles = tuple(metrics.title_counts.index[:TOP_N_TREND_TITLES])
+    if trend_titles:
+        title_trend = get_daily_trend(*trend_args, dimension='canonical_title', labels=trend_titles)
+
+        def build_title_trend_lines():
+            trend = resample_trend(title_trend, granularity)
+            return build_line_figure(trend, f"Top {len(trend_titles)} Job Titles, {granularity}", 'Number of Postings')
+
+        fig_title_trend = figure_cache.get_or_build((filter_key, 'title_trend', granularity), build_title_trend_lines)
+        st.plotly_chart(fig_title_trend, use_container_width=True)
 
 
 # --- Display the raw data (optional) ---
+@st.cache_data(max_entries=32, show_spinner=False)
+def get_sorted_rows(_dataf, _rows, filter_key, column, ascending):
+    """Row ids of the selection in sort order, cached so paging through them does not sort again."""
+    return sort_rows(_dataf, _rows, column, ascending)
+
+
+profile.section("raw_data")
 st.header("Explore Raw Data")
-st.markdown("Optionally view a sample of the data after applying filters.")
-if st.checkbox("Show Filtered Raw Data Sample"):
-    st.markdown("Displaying a sample of the filtered job postings data.")
-    st.dataframe(filtered_df.head(50)) # Show top 50 rows of filtered data
-    st.caption(f"Total filtered postings: {len(filtered_df):,}")
-
-# --- Summary Section (Using the HTML block) ---
-st.header("Initial Dataset Summary & Insights")
-st.markdown("Key takeaways derived from an analysis of the original, unfiltered dataset.")
-
-# Note: This summary is static based on the original analysis.
-# For a dynamic summary reflecting filters, you'd need to recalculate these points based on filtered_df.
-html_code = """
-<div class="summary-container">
-    <h2><i class="fas fa-briefcase"></i> Initial Dataset Insights Summary</h2>
-    <div class="summary-point">
-        <h3>1. Overall Job Market Overview</h3>
-        <p>The initial dataset comprised <span class="highlight">~29,500+ job postings</span> across numerous distinct job categories, indicating a diverse job market landscape at the time of data collection.</p>
-    </div>
-    <div class="summary-point">
-        <h3>2. Dominant Sector</h3>
-        <p>The <span class="highlight">IT sector</span> showed significant activity in the original data, often having the highest number of job postings.</p>
-    </div>
-    <div class="summary-point">
-        <h3>3. Key Role</h3>
-        <p>Roles like <span class="highlight">"Software Developer"</span> frequently appeared among the most in-demand titles, highlighting a consistent need for software development skills.</p>
-    </div>
-    <div class="summary-point">
-        <h3>4. Leading Employers</h3>
-        <p>Major corporations like <span class="highlight">JPMorgan Chase Bank, N.A.</span>, <span class="highlight">IBM</span>, and <span class="highlight">Accenture</span> were often listed among the top hiring companies in the initial dataset.</p>
-    </div>
-    <div class="summary-point">
-        <h3>5. Critical Skill Sets (from original analysis)</h3>
-        <p>Alongside technical skills (like Python, Java, Cloud platforms), <span class="highlight">Management</span> and <span class="highlight">Communication</span> were frequently sought after, emphasizing the value of soft skills.</p>
-    </div>
-    <div class="summary-point">
-        <h3>6. Employment Type Trend (from original analysis)</h3>
-        <p>The job market analyzed was heavily dominated by <span class="highlight">full-time positions</span>, typically representing over 90% of postings.</p>
-    </div>
+st.markdown("Browse every posting that matches the current filters, one page at a time.")
+if st.checkbox("Show Filtered Raw Data"):
+    explorer_columns = [col for col in df.columns if col != 'posting_hash'] # Internal identity hash
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    with col1:
+        shown_columns = st.multiselect("Columns", explorer_columns, default=explorer_columns, placeholder="All")
+    with col2:
+        # Search results are listed best match first unless another order is picked
+        sort_options = (["Relevance"] if ranked_rows is not None else []) + ["Original order"] + explorer_columns
+        sort_column = st.selectbox("Sort by", sort_options)
+    with col3:
+        page_size = st.selectbox("Rows per page", EXPLORER_PAGE_SIZES, index=1)
+    with col4:
+        sort_ascending = st.toggle("Ascending", value=True, disabled=sort_column in ("Relevance", "Original order"))
+
+    # Only the row ids are sorted; the rows themselves are gathered one page at a time
+    if sort_column == "Relevance":
+        ordered_rows = ranked_rows[np.isin(ranked_rows, filtered_df.index.to_numpy(), assume_unique=True)]
+    elif sort_column == "Original order":
+        ordered_rows = np.arange(len(df)) if selected_rows is None else selected_rows
+    else:
+        ordered_rows = get_sorted_rows(df, selected_rows, filter_key, sort_column, sort_ascending)
+    page_count = max(1, -(-len(ordered_rows) // page_size))
+    page_number = st.number_input(f"Page (of {page_count:,})", min_value=1, max_value=page_count, value=1)
+    page_rows = ordered_rows[(page_number - 1) * page_size:page_number * page_size]
+
+    st.dataframe(explorer_page(df, page_rows, shown_columns or explorer_columns))
+    profile.set_rows(len(page_rows))
+    st.caption(
+        f"Postings {(page_number - 1) * page_size + 1:,}-{(page_number - 1) * page_size + len(page_rows):,} "
+        f"of {len(ordered_rows):,}. Descriptions are shortened to {TEXT_PREVIEW_CHARS} characters; "
+        "pick a posting below to read it in full."
+    )
+
+    # The full description is only fetched for the one posting asked for
+    full_text_row = st.selectbox(
+        "Full job description",
+        page_rows.tolist(),
+        index=None,
+        format_func=lambda row: f"{row}: {df['job_title'].iat[row]} at {df['company_name'].iat[row]}",
+        placeholder="Choose a posting on this page",
+    )
+    if full_text_row is not None:
+        st.text_area("Job description", df['job_description'].iat[full_text_row], height=250, disabled=True)
+
+# --- Data Export ---
+@st.fragment(run_every=EXPORT_POLL_SECONDS)
+def show_export_progress(job):
+    """Progress of a running export, refreshed on its own; the page reruns once the file is ready."""
+    if job.done():
+        st.rerun()
+    st.progress(job.progress, text=f"Writing {job.file_name}: {job.rows_written:,} of {job.total_rows:,} postings")
+
+
+def show_export_download(job):
+    """Download of a finished export, served from disk when static serving can take it."""
+    size = os.path.getsize(job.path)
+    if st.get_option("server.enableStaticServing") and size <= STATIC_FILE_MAX_BYTES:
+        url = "app/static/" + os.path.relpath(job.path, STATIC_DIR).replace(os.sep, "/")
+        st.markdown(
+            f'<a href="{html.escape(url)}" download="{html.escape(job.file_name)}">Download {html.escape(job.file_name)}</a> '
+            f"({size / 1024 / 1024:,.1f} MB)",
+            unsafe_allow_html=True
+        )
+        return
+
+    # Otherwise Streamlit holds the file in memory to send it, but only once the button is clicked
+    def read_export():
+        with open(job.path, "rb") as f:
+            return f.read()
+    st.download_button(f"Download {job.file_name} ({size / 1024 / 1024:,.1f} MB)", read_export, job.file_name, on_click="ignore")
+    if size > STATIC_FILE_MAX_BYTES:
+        st.caption("Large files are sent through the app server; Parquet is the most compact format for big selections.")
+
+
+profile.section("export")
+st.header("Export Data")
+st.markdown("Download every posting that matches the current filters. The file is written in the background while you keep exploring.")
+export_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True)
+export_key = (filter_key, export_format)
+export_job = st.session_state.get("export_job")
+if export_job is not None and export_job.key != export_key:
+    # The filters changed, so the file no longer matches them; an export still running stops at its next chunk
+    export_job.discard()
+    export_job = st.session_state["export_job"] = None
+elif export_job is not None and export_job.done() and export_job.error() is None and not os.path.exists(export_job.path):
+    st.info("The last export has expired. Prepare it again to download it.") # Removed by a later export after an hour
+    export_job = st.session_state["export_job"] = None
+if st.button("Prepare export", disabled=export_job is not None and export_job.error() is None):
+    file_stem = f"job_postings_{time.strftime('%Y%m%d_%H%M%S')}"
+    export_job = st.session_state["export_job"] = start_export(export_key, df, selected_rows, export_format, EXPORT_DIR, file_stem)
+if export_job is not None:
+    if not export_job.done():
+        show_export_progress(export_job)
+    elif export_job.error() is not None:
+        st.error(f"The export failed: {export_job.error()}")
+    else:
+        show_export_download(export_job)
+
+# --- Summary Section ---
+def render_insight(number, insight):
+    """One summary point as HTML, with its values escaped and highlighted."""
+    values = [f'<span class="highlight">{html.escape(str(value))}</span>' for value in insight.values]
+    return f"""
     <div class="summary-point">
-        <h3>7. Further Research Potential</h3>
-        <p>Further analysis could explore <span class="highlight">salary trends</span>, deeper <span class="highlight">geographical distributions</span> (city-level), and the evolution of skill demands over time.</p>
-    </div>
-    <p style="text-align: center; margin-top: 20px; font-size: 0.9em; color: #ccc;"><i>Note: This summary reflects insights from the initial, unfiltered dataset. Use the filters and interactive charts above for current, specific analysis.</i></p>
+        <h3>{number}. {html.escape(insight.title)}</h3>
+        <p>{html.escape(insight.text).format(*values)}</p>
+    </div>"""
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_summary_html(filter_key, _metrics, _skill_counts, dataset_postings):
+    """Summary insights for the selection as HTML, worded from its aggregates once per filter key."""
+    insights = build_insights(_metrics, _skill_counts, dataset_postings)
+    points = "".join(render_insight(number, insight) for number, insight in enumerate(insights, start=1))
+    return f"""
+<div class="summary-container">
+    <h2>{BRIEFCASE_ICON} Dataset Insights Summary</h2>{points}
+    <p style="text-align: center; margin-top: 20px; font-size: 0.9em; color: #ccc;"><i>Note: This summary reflects the current filters. Use the interactive charts above for more detail.</i></p>
 </div>
 """
-st.markdown(html_code, unsafe_allow_html=True)
+
+
+profile.section("summary")
+st.header("Dataset Summary & Insights")
+st.markdown("Key takeaways for the current data selection, derived from the same aggregates as the charts above.")
+dataset_postings = len(data.duplicates.unique_rows) if unique_only else len(df)
+st.markdown(get_summary_html(filter_key, metrics, skill_counts, dataset_postings), unsafe_allow_html=True)
 
 # --- Footer ---
 st.markdown("---")
 st.caption("Dashboard developed using Streamlit & Plotly | Data Source: Scraped Job Postings (Illustrative)")
+
+render_diagnostics(profile)
@@ -0,0 +1,206 @@
+"""Times and memory-profiles each stage of the dashboard pipeline on synthetic data at several scales.
+
+Run from the repository root:
+
+    python -m benchmarks.run --rows 10000 100000 --output bench.json --baseline benchmarks/baseline.json
+
+Datasets are generated once into benchmarks/data and reused. With --baseline the run is compared stage by
+stage and exits with status 1 if any stage got slower or used more memory than the tolerance allows.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tracemalloc
+
+import pandas as pd
+import plotly.io as pio
+
+from analytics import (
+    CUBE_DIMENSIONS,
+    FILTER_COLUMNS,
+    SALARY_DIMENSIONS,
+    SALARY_SKETCH_COLUMNS,
+    TREND_COLUMNS,
+    TREND_DIMENSIONS,
+    TOP_N_SKILLS,
+    CountCube,
+    RowIndex,
+    SalarySketches,
+    SkillMatrix,
+    TrendRollup,
+    compute_dashboard_metrics,
+    filter_data,
+    load_skills,
+    resample_trend,
+)
+from benchmarks.synthetic import GENERATOR_VERSION, generate_csv
+from charts import build_bar_figure, build_state_map
+from dedup import DuplicateIndex
+from geo import load_state_shapes, state_codes
+from ingest import read_csv_chunked
+from titles import TitleMapping
+
+logger = logging.getLogger("benchmarks")
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000, 10_000_000]
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data") # Generated datasets, not committed
+RESULTS_VERSION = 1
+DEFAULT_TOLERANCE = 0.25 # Allowed relative growth over the baseline before a stage counts as regressed
+MIN_COMPARED_SECONDS = 0.05 # Faster stages are too noisy to compare
+# Selections replayed by the per-filter stages: the default view, a narrow one and a multi-value one
+SELECTIONS = [
+    {'category': ['IT'], 'state': []},
+    {'category': ['Finance'], 'state': ['Texas']},
+    {'category': ['IT', 'Healthcare', 'Sales'], 'state': ['California', 'New York', 'Washington']},
+    {'category': [], 'state': []},
+]
+
+
+def measure(stage, rows, results, func):
+    """Runs func once, recording wall time, CPU time and peak traced allocation. Returns its result."""
+    tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    value = func()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results.append({
+        'rows': rows, 'stage': stage,
+        'wall_seconds': round(wall, 4), 'cpu_seconds': round(cpu, 4), 'peak_bytes': peak,
+    })
+    logger.info(f"{rows:>10,} rows | {stage:<18} | {wall:8.3f} s wall | {cpu:8.3f} s CPU | {peak / 1024 / 1024:9.1f} MB peak")
+    return value
+
+
+def build_figures(metrics, skill_counts):
+    """Builds and serializes the page's bar charts, as Streamlit does before sending them."""
+    figures = [
+        build_bar_figure(metrics.category_counts, "Categories", 'Job Category', 'Number of Postings'),
+        build_bar_figure(metrics.title_counts, "Titles", 'Job Title', 'Number of Postings', horizontal=True),
+        build_bar_figure(metrics.company_counts, "Companies", 'Company Name', 'Number of Postings', horizontal=True),
+        build_bar_figure(skill_counts, "Skills", 'Skill', 'Frequency in Postings', horizontal=True),
+    ]
+    return sum(len(pio.to_json(fig, validate=False)) for fig in figures)
+
+
+def build_state_maps(cube, selections):
+    """Summarizes the postings per state and builds and serializes the state map, once per category filter.
+
+    The boundaries are referenced by URL, as the dashboard does when it serves them as a static file.
+    """
+    shapes = load_state_shapes()
+    regions = state_codes(cube.levels['state'], shapes)
+    figures = [
+        build_state_map(
+            cube.region_summary({'category': selection['category']}, regions), shapes, "States",
+            shapes_url="app/static/us_states.geojson",
+        )
+        for selection in selections
+    ]
+    return sum(len(pio.to_json(fig, validate=False)) for fig in figures)
+
+
+def run_scale(rows, seed, results):
+    """Runs every stage once on the dataset with the given number of rows."""
+    path = os.path.join(DATA_DIR, f"jobs_{rows}_{seed}_v{GENERATOR_VERSION}.csv")
+    if not os.path.exists(path):
+        generate_csv(path, rows, seed)
+
+    # The benchmark measures where the pipeline stops scaling, so the ingest memory budget is lifted
+    df = measure("parse_clean", rows, results, lambda: read_csv_chunked(path, budget_bytes=sys.maxsize))
+    # A fresh mapping, so every distinct title is canonicalized as on a first load
+    df['canonical_title'] = measure("canonical_titles", rows, results, lambda: TitleMapping().canonicalize(df['job_title']))
+    row_index = measure("row_index", rows, results, lambda: RowIndex(df, FILTER_COLUMNS))
+    cube = measure("count_cube", rows, results, lambda: CountCube(df, CUBE_DIMENSIONS))
+    trends = measure("trend_rollup", rows, results, lambda: TrendRollup(df[TREND_COLUMNS], TREND_DIMENSIONS))
+    salaries = measure("salary_sketches", rows, results, lambda: SalarySketches(df[SALARY_SKETCH_COLUMNS], SALARY_DIMENSIONS))
+    skills = measure("skills_extraction", rows, results, lambda: SkillMatrix(df['job_description'], load_skills()))
+    measure("near_duplicates", rows, results, lambda: DuplicateIndex.build(df['job_description']))
+
+    filtered = measure("filter_data", rows, results, lambda: [
+        filter_data(df, row_index, selection['category'], selection['state']) for selection in SELECTIONS
+    ])
+    selected_rows = [None if len(frame) == len(df) else frame.index.to_numpy() for frame in filtered]
+    aggregates = measure("aggregation", rows, results, lambda: [
+        (compute_dashboard_metrics(cube, selection), skills.counts(selected).head(TOP_N_SKILLS))
+        for selection, selected in zip(SELECTIONS, selected_rows)
+    ])
+    measure("figures", rows, results, lambda: [build_figures(*aggregate) for aggregate in aggregates])
+    measure("state_map", rows, results, lambda: build_state_maps(cube, SELECTIONS))
+    measure("salary_queries", rows, results, lambda: [
+        salaries.quantiles(selection, 'canonical_title', metrics.title_counts.index) for selection, (metrics, _) in zip(SELECTIONS, aggregates)
+    ])
+    measure("trend_queries", rows, results, lambda: [
+        resample_trend(trends.daily(selection, 'canonical_title', metrics.title_counts.index[:5]), 'Weekly')
+        for selection, (metrics, _) in zip(SELECTIONS, aggregates)
+    ])
+
+
+def compare(results, baseline, tolerance):
+    """Stage-by-stage comparison with the baseline. Returns the regressions as readable lines."""
+    previous = {(entry['rows'], entry['stage']): entry for entry in baseline['results']}
+    regressions = []
+    for entry in results:
+        base = previous.get((entry['rows'], entry['stage']))
+        if base is None:
+            continue
+        slower = base['wall_seconds'] >= MIN_COMPARED_SECONDS and entry['wall_seconds'] > base['wall_seconds'] * (1 + tolerance)
+        larger = entry['peak_bytes'] > base['peak_bytes'] * (1 + tolerance)
+        if slower or larger:
+            regressions.append(
+                f"{entry['rows']:,} rows {entry['stage']}: {entry['wall_seconds']:.3f} s (baseline {base['wall_seconds']:.3f} s), "
+                f"{entry['peak_bytes'] / 1024 / 1024:.1f} MB (baseline {base['peak_bytes'] / 1024 / 1024:.1f} MB)"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard pipeline on synthetic job postings.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="dataset sizes to run")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic data")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    logging.getLogger().setLevel(logging.WARNING) # Keep the pipeline's own logging out of the report
+    logger.setLevel(logging.INFO)
+    # Plotly loads its validators on first use; keep that one-time cost out of the first scale's figures
+    build_bar_figure(pd.Series([1], index=["warm-up"]), "", "", "")
+    results = []
+    for rows in args.rows:
+        run_scale(rows, args.seed, results)
+
+    report = {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""Offline generator of synthetic job postings with realistic category, state, title and company distributions."""
+import os
+import logging
+
+import numpy as np
+import pandas as pd
+
+from analytics import SKILLS_LIST
+
+GENERATE_CHUNK_ROWS = 250_000 # Rows generated and written per step, so 10M-row files never sit in memory
+GENERATOR_VERSION = 3 # Part of the dataset file names; bump whenever the generated columns change
+LAST_POSTING_DATE = np.datetime64('2024-06-30') # Postings are dated over the DATE_SPAN_DAYS before this day
+DATE_SPAN_DAYS = 180
+WEEKEND_WEIGHT = 0.3 # Fewer postings go up on Saturdays and Sundays
+SALARY_SHARE = 0.6 # Postings that state any pay
+SALARY_SPREAD = 0.35 # Sigma of the log-normal pay around the category's typical salary
+
+# --- Vocabularies ---
+# Category weights roughly follow the original scrape: IT dominates, then a long tail
+CATEGORIES = {
+    'IT': 30, 'Finance': 10, 'Healthcare': 9, 'Engineering': 8, 'Sales': 7, 'Marketing': 5,
+    'Education': 4, 'Human Resources': 4, 'Customer Service': 4, 'Manufacturing': 3, 'Legal': 2,
+    'Logistics': 3, 'Retail': 3, 'Construction': 2, 'Hospitality': 2, 'Science': 2, 'Media': 1, 'Government': 1,
+}
+# Weights roughly proportional to state population
+STATES = {
+    'California': 39, 'Texas': 30, 'Florida': 22, 'New York': 20, 'Pennsylvania': 13, 'Illinois': 13,
+    'Ohio': 12, 'Georgia': 11, 'North Carolina': 11, 'Michigan': 10, 'New Jersey': 9, 'Virginia': 9,
+    'Washington': 8, 'Arizona': 7, 'Massachusetts': 7, 'Tennessee': 7, 'Indiana': 7, 'Maryland': 6,
+    'Missouri': 6, 'Wisconsin': 6, 'Colorado': 6, 'Minnesota': 6, 'South Carolina': 5, 'Alabama': 5,
+    'Louisiana': 5, 'Kentucky': 5, 'Oregon': 4, 'Oklahoma': 4, 'Connecticut': 4, 'Utah': 3, 'Iowa': 3,
+    'Nevada': 3, 'Arkansas': 3, 'Mississippi': 3, 'Kansas': 3, 'New Mexico': 2, 'Nebraska': 2,
+    'Idaho': 2, 'West Virginia': 2, 'Hawaii': 1, 'New Hampshire': 1, 'Maine': 1, 'Montana': 1,
+    'Rhode Island': 1, 'Delaware': 1, 'South Dakota': 1, 'North Dakota': 1, 'Alaska': 1, 'Vermont': 1,
+    'Wyoming': 1, 'Remote': 4,
+}
+ROLES = {
+    'IT': ['Software Developer', 'Software Engineer', 'Data Analyst', 'Data Scientist', 'DevOps Engineer',
+           'Systems Administrator', 'IT Support Specialist', 'Cloud Architect', 'QA Engineer', 'Full Stack Developer'],
+    'Finance': ['Financial Analyst', 'Accountant', 'Auditor', 'Loan Officer', 'Investment Analyst', 'Controller'],
+    'Healthcare': ['Registered Nurse', 'Medical Assistant', 'Pharmacist', 'Physical Therapist', 'Caregiver'],
+    'Engineering': ['Mechanical Engineer', 'Electrical Engineer', 'Civil Engineer', 'Project Engineer'],
+    'Sales': ['Sales Associate', 'Account Executive', 'Sales Manager', 'Business Development Representative'],
+    'Marketing': ['Marketing Manager', 'Content Writer', 'SEO Specialist', 'Brand Manager'],
+}
+GENERIC_ROLES = ['Manager', 'Coordinator', 'Specialist', 'Assistant', 'Analyst', 'Associate', 'Supervisor']
+SENIORITY = ['', '', '', 'Senior ', 'Sr. ', 'Junior ', 'Lead ', 'Principal '] # Plain titles are the most common
+TITLE_SUFFIXES = ['', '', '', '', ' - Remote', ' II', ' (Hybrid)']
+COMPANY_WORDS = ['Global', 'United', 'Advanced', 'Pacific', 'Summit', 'Bright', 'Core', 'Blue', 'North', 'Prime',
+                 'Apex', 'Vertex', 'Metro', 'Pioneer', 'Harbor', 'Silver', 'Granite', 'Evergreen', 'Atlas', 'Nova']
+COMPANY_KINDS = ['Systems', 'Health', 'Financial', 'Solutions', 'Technologies', 'Group', 'Partners', 'Labs', 'Logistics']
+COMPANY_FORMS = ['Inc.', 'LLC', 'Corp.', 'Co.', 'N.A.']
+JOB_TYPES = {'Full-time': 88, 'Part-time': 4, 'Contract': 3, 'Full-time, Contract': 1, 'Internship': 1, 'Temporary': 1, '': 2}
+# Typical annual pay per category, others get DEFAULT_PAY
+CATEGORY_PAY = {
+    'IT': 105_000, 'Finance': 85_000, 'Healthcare': 70_000, 'Engineering': 95_000, 'Sales': 65_000, 'Marketing': 75_000,
+    'Legal': 90_000, 'Science': 80_000, 'Retail': 35_000, 'Hospitality': 33_000, 'Customer Service': 38_000,
+}
+DEFAULT_PAY = 55_000
+# Ways the scraped salary text states pay, in the formats the site uses
+SALARY_FORMATS = {
+    "${low:,.0f} - ${high:,.0f} a year": 5,
+    "${hourly:.2f} an hour": 3,
+    "${hourly_low:.0f} - ${hourly_high:.0f} an hour": 2,
+    "From ${monthly:,.0f} a month": 1,
+    "Up to ${thousands:.0f}K a year": 1,
+    "${thousands:.0f}K": 1,
+}
+OPENINGS = [
+    "We are looking for a motivated {title} to join {company}.",
+    "{company} is hiring a {title} for our growing team.",
+    "Join {company} as a {title} and help us build what comes next.",
+    "As a {title} at {company} you will work with teams across the business.",
+]
+SKILL_SENTENCES = [
+    "Experience with {a} and {b} is required.",
+    "Strong {a} skills and familiarity with {b} are a plus.",
+    "You will use {a}, {b} and {c} every day.",
+    "Knowledge of {a} preferred.",
+]
+CLOSINGS = [
+    "We offer competitive pay, health insurance and paid time off.",
+    "This position may require occasional travel.",
+    "We are an equal opportunity employer.",
+    "Benefits include a 401(k) plan with company match.",
+]
+
+
+def weighted(rng, choices, size):
+    """Samples from a {value: weight} mapping."""
+    values = np.array(list(choices), dtype=object)
+    weights = np.array(list(choices.values()), dtype=float)
+    return values[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+
+def zipf_choice(rng, values, size, exponent=1.1):
+    """Samples values with Zipf-like popularity: a few are very common, most are rare."""
+    weights = 1.0 / np.arange(1, len(values) + 1) ** exponent
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+
+def company_names(rng, rows):
+    """A pool of company names that grows with the dataset, as larger scrapes reach more employers."""
+    count = max(50, int(np.sqrt(rows) * 5))
+    names = (pd.Series(rng.choice(COMPANY_WORDS, count)) + " " + rng.choice(COMPANY_KINDS, count)
+             + " " + rng.choice(COMPANY_FORMS, count))
+    return names.drop_duplicates().tolist()
+
+
+def salaries(rng, category):
+    """Salary text for each posting, or None where it states no pay."""
+    rows = len(category)
+    typical = pd.Series(category).map(CATEGORY_PAY).fillna(DEFAULT_PAY).to_numpy()
+    annual = np.round(typical * rng.lognormal(0.0, SALARY_SPREAD, rows), -3)
+    formats = weighted(rng, SALARY_FORMATS, rows)
+    texts = [
+        text.format(low=pay * 0.9, high=pay * 1.1, hourly=pay / 2080, hourly_low=pay * 0.9 / 2080,
+                    hourly_high=pay * 1.1 / 2080, monthly=pay / 12, thousands=pay / 1000)
+        for text, pay in zip(formats, annual)
+    ]
+    return pd.Series(texts).where(rng.random(rows) < SALARY_SHARE, None)
+
+
+def generate_chunk(rng, rows, companies):
+    """One chunk of raw postings with the columns of the scraped CSV."""
+    category = weighted(rng, CATEGORIES, rows)
+    # Titles: a role typical for the category (or a generic one), with seniority and location variants
+    role = zipf_choice(rng, GENERIC_ROLES, rows)
+    for name, roles in ROLES.items():
+        in_category = category == name
+        role[in_category] = zipf_choice(rng, roles, int(in_category.sum()))
+    title = pd.Series(rng.choice(SENIORITY, rows)) + pd.Series(role) + pd.Series(rng.choice(TITLE_SUFFIXES, rows))
+    company = pd.Series(zipf_choice(rng, companies, rows))
+
+    skills = [zipf_choice(rng, SKILLS_LIST, rows, exponent=0.8) for _ in range(3)]
+    openings = pd.Series(rng.choice(OPENINGS, rows))
+    skill_sentences = pd.Series(rng.choice(SKILL_SENTENCES, rows))
+    description = pd.Series([opening.format(title=t, company=c) for opening, t, c in zip(openings, title, company)])
+    description = description + " " + pd.Series([
+        sentence.format(a=a, b=b, c=c) for sentence, a, b, c in zip(skill_sentences, *skills)
+    ]) + " " + pd.Series(rng.choice(CLOSINGS, rows))
+
+    job_type = pd.Series(weighted(rng, JOB_TYPES, rows)).replace('', None) # Some postings leave it empty
+    days = LAST_POSTING_DATE - np.arange(DATE_SPAN_DAYS)[::-1]
+    day_weights = np.where(pd.DatetimeIndex(days).dayofweek >= 5, WEEKEND_WEIGHT, 1.0)
+    date_posted = days[rng.choice(DATE_SPAN_DAYS, size=rows, p=day_weights / day_weights.sum())]
+    return pd.DataFrame({
+        'category': category,
+        'state': weighted(rng, STATES, rows),
+        'job_title': title,
+        'company_name': company,
+        'job_description': description,
+        'job_type': job_type,
+        'salary': salaries(rng, category),
+        'date_posted': pd.DatetimeIndex(date_posted).strftime('%Y-%m-%d'),
+    })
+
+
+def generate_csv(path, rows, seed=0):
+    """Writes rows synthetic postings to path in chunks. The same rows and seed always give the same file."""
+    rng = np.random.default_rng(seed)
+    companies = company_names(rng, rows)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8", newline="") as f:
+        for start in range(0, rows, GENERATE_CHUNK_ROWS):
+            chunk = generate_chunk(rng, min(GENERATE_CHUNK_ROWS, rows - start), companies)
+            chunk.to_csv(f, index=False, header=start == 0)
+    os.replace(path + ".tmp", path) # Never leave a truncated dataset behind for the next run
+    logging.info(f"Generated {rows:,} synthetic postings in {path}.")
+    return path
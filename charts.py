@@ -0,0 +1,149 @@
+"""Streamlit-free construction and caching of the dashboard's Plotly figures."""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+
+# --- Common Plotly Layout ---
+def get_plotly_layout():
+    """Returns a dictionary for common Plotly layout settings."""
+    return {
+        'paper_bgcolor': 'rgba(0,0,0,0)', # Transparent paper
+        'plot_bgcolor': 'rgba(0,0,0,0)',  # Transparent plot area
+        'font_color': '#ffffff',          # White font color
+        'title_font_size': 20,            # Slightly smaller title
+        'font': dict(family='Inter', size=12), # Match body font
+        'xaxis': dict(showgrid=False, zeroline=False, color='#ccc'), # Cleaner axes, light gray color
+        'yaxis': dict(showgrid=True, gridcolor='#444', color='#ccc'), # Subtle gridlines on y-axis, light gray color
+        'legend': dict(bgcolor='rgba(0,0,0,0.5)', bordercolor='#888', font=dict(color='#ccc')), # Semi-transparent legend with light gray font
+        'margin': dict(l=20, r=20, t=50, b=20), # Adjust margins for better fit
+         'hoverlabel': dict(bgcolor="black", font_size=12, font_family="Inter", font_color="#fff"), # Dark hover label
+         'hovermode': 'closest' # Improve hover behavior
+    }
+
+
+# --- Figure Building ---
+class FigureCache:
+    """LRU cache of built figures keyed by (filter key, chart), bounded by their serialized size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._figures = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock() # Shared by all sessions
+
+    def get_or_build(self, key, build):
+        """Returns the cached figure for key, building and caching it on a miss."""
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                return self._figures[key][0]
+        fig = build()
+        size = len(pio.to_json(fig, validate=False))
+        with self._lock:
+            if key not in self._figures:
+                self._figures[key] = (fig, size)
+                self._total_bytes += size
+            while self._total_bytes > self.max_bytes and len(self._figures) > 1:
+                _, (_, evicted_size) = self._figures.popitem(last=False) # Least recently used first
+                self._total_bytes -= evicted_size
+        return fig
+
+
+@lru_cache(maxsize=None)
+def get_dashboard_template():
+    """Compact dark template compiled once, instead of shipping the full plotly_dark template with every chart."""
+    return go.layout.Template(layout=go.Layout(**get_plotly_layout()))
+
+
+def build_bar_figure(counts, title, label_title, value_title, horizontal=False, color=None, colorscale=None):
+    """Builds a bar chart carrying only the top-N labels and counts, colored by one color or by count."""
+    labels = counts.index.tolist()
+    values = counts.to_numpy()
+    if colorscale:
+        marker = dict(color=values, colorscale=colorscale, colorbar=dict(title=dict(text='Count')))
+    else:
+        marker = dict(color=color)
+    bar = go.Bar(
+        x=values if horizontal else labels,
+        y=labels if horizontal else values,
+        orientation='h' if horizontal else 'v',
+        marker=marker,
+        hovertemplate=f"{label_title}: %{{{'y' if horizontal else 'x'}}}<br>{value_title}: %{{{'x' if horizontal else 'y'}}}<extra></extra>",
+    )
+    fig = go.Figure(bar, layout=dict(template=get_dashboard_template(), title=dict(text=title)))
+    fig.update_xaxes(title_text=value_title if horizontal else label_title)
+    fig.update_yaxes(title_text=label_title if horizontal else value_title)
+    return fig
+
+
+def build_line_figure(frame, title, value_title, rolling_window=None):
+    """Line chart with one line per column of a date-indexed table, plus a dashed rolling average of each if asked."""
+    dates = frame.index.to_pydatetime().tolist()
+    fig = go.Figure(layout=dict(template=get_dashboard_template(), title=dict(text=title)))
+    for column in frame.columns:
+        values = frame[column]
+        fig.add_trace(go.Scatter(
+            x=dates, y=values.to_numpy(), name=str(column), mode='lines+markers' if len(frame) < 30 else 'lines',
+            hovertemplate=f"{column}<br>%{{x|%b %d, %Y}}: %{{y:,}}<extra></extra>",
+        ))
+        if rolling_window:
+            fig.add_trace(go.Scatter(
+                x=dates, y=values.rolling(rolling_window, min_periods=1).mean().round(1).to_numpy(),
+                name=f"{column} ({rolling_window}-period average)", mode='lines', line=dict(dash='dash'),
+                hovertemplate=f"{rolling_window}-period average<br>%{{x|%b %d, %Y}}: %{{y:,.1f}}<extra></extra>",
+            ))
+    fig.update_xaxes(title_text='Date')
+    fig.update_yaxes(title_text=value_title, rangemode='tozero')
+    return fig
+
+
+def build_state_map(summary, shapes, title, colorscale=None, shapes_url=None):
+    """Choropleth of postings per state over the bundled boundaries, with each state's top category and company on hover.
+
+    summary is indexed by the features' postal codes; states missing from it are drawn with zero postings.
+    With shapes_url the browser fetches the boundaries from there once and caches them, instead of receiving
+    them inside every figure.
+    """
+    codes = [feature['id'] for feature in shapes['features']]
+    names = [feature['properties']['name'] for feature in shapes['features']]
+    frame = summary.reindex(codes)
+    choropleth = go.Choropleth(
+        geojson=shapes_url or shapes,
+        locations=codes,
+        z=frame['postings'].fillna(0).astype('int64').to_numpy(),
+        customdata=list(zip(names, frame['top_category'].fillna('-'), frame['top_company'].fillna('-'))),
+        colorscale=colorscale,
+        marker=dict(line=dict(color='#1f1f1f', width=0.5)),
+        colorbar=dict(title=dict(text='Postings')),
+        hovertemplate="<b>%{customdata[0]}</b><br>Postings: %{z:,}<br>Top category: %{customdata[1]}"
+                      "<br>Top company: %{customdata[2]}<extra></extra>",
+    )
+    fig = go.Figure(choropleth, layout=dict(template=get_dashboard_template(), title=dict(text=title)))
+    # Only the bundled shapes are drawn: the base map's land and coastline layers would be fetched from a CDN
+    fig.update_geos(scope='usa', visible=False, bgcolor='rgba(0,0,0,0)')
+    return fig
+
+
+def build_salary_box_figure(quantiles, title, color=None):
+    """Horizontal box per row of a salary quantile table, drawn from its quartiles with P10 and P90 as whiskers."""
+    quantiles = quantiles[quantiles['salaries'] > 0]
+    labels = quantiles.index.tolist()
+    box = go.Box(
+        y=labels,
+        q1=quantiles['P25'].to_numpy(),
+        median=quantiles['Median'].to_numpy(),
+        q3=quantiles['P75'].to_numpy(),
+        lowerfence=quantiles['P10'].to_numpy(),
+        upperfence=quantiles['P90'].to_numpy(),
+        orientation='h',
+        marker=dict(color=color),
+        name='Annual Salary',
+    )
+    fig = go.Figure(box, layout=dict(template=get_dashboard_template(), title=dict(text=title)))
+    fig.update_xaxes(title_text='Annual Salary (USD)', tickprefix='$', tickformat=',.0f')
+    fig.update_yaxes(title_text='', autorange='reversed') # First row on top
+    return fig
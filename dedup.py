@@ -0,0 +1,179 @@
+"""Near-duplicate postings: MinHash signatures of the descriptions, bucketed with locality-sensitive hashing."""
+import logging
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from storage import save_optional
+
+SHINGLE_WORDS = 5 # Words per shingle; descriptions are compared as sets of shingles
+# Signature length. 64 x 16 bits keeps it at 128 bytes per posting. For LSH the signature is cut into
+# 16 bands of 4 values, each read as one 64-bit key; postings sharing any band key are candidates.
+MINHASH_PERMUTATIONS = 64
+DUPLICATE_THRESHOLD = 0.8 # Estimated Jaccard similarity from which a candidate counts as a duplicate
+MINHASH_SEED = 20240501 # Fixed, so signatures saved by one process compare with those computed by another
+SIGNATURE_CHUNK_ROWS = 10_000 # Descriptions shingled per step, to bound the temporary word lists
+VERIFY_CHUNK_PAIRS = 250_000 # Candidate pairs compared per step
+SHINGLE_PRIME = np.uint64(1_000_003) # Combines the hashes of a shingle's words, order-sensitively
+# Descriptions that stand for a missing one; ingest fills missing text with 'Unknown'. Their postings are never
+# duplicates of each other, and their signature is left all zero, which no text produces in practice.
+PLACEHOLDER_DESCRIPTIONS = ['', 'unknown', 'n/a', 'none']
+DEDUP_VERSION = 2 # Bump whenever signatures or clustering change, so saved indexes are rebuilt
+
+_rng = np.random.default_rng(MINHASH_SEED)
+# Multiply-shift hash functions (a * x + b) mod 2^64, one per permutation; a must be odd
+HASH_MULTIPLIERS = _rng.integers(1, 2**63, MINHASH_PERMUTATIONS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+HASH_OFFSETS = _rng.integers(0, 2**63, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingle_hashes(descriptions):
+    """(row, hash) of every word shingle of the descriptions, grouped by row. Short texts are one shingle."""
+    tokens = descriptions.str.lower().str.findall(r"\w+").reset_index(drop=True).explode().dropna()
+    rows = tokens.index.to_numpy(dtype=np.int64)
+    codes, words = pd.factorize(tokens) # Each distinct word is hashed once
+    word_hashes = pd.util.hash_array(words.to_numpy(dtype=object))[codes]
+    # Hash of each window of SHINGLE_WORDS words, kept only if the window lies inside one description
+    count = max(len(word_hashes) - SHINGLE_WORDS + 1, 0)
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(SHINGLE_WORDS):
+        hashes = hashes * SHINGLE_PRIME + word_hashes[offset:offset + count]
+    inside = rows[:count] == rows[SHINGLE_WORDS - 1:]
+    rows, hashes = rows[:count][inside], hashes[inside]
+
+    # Descriptions shorter than a shingle are represented by their whole text
+    short = np.setdiff1d(np.arange(len(descriptions)), rows, assume_unique=True)
+    if len(short):
+        texts = descriptions.iloc[short].str.lower().str.split().str.join(" ").to_numpy(dtype=object)
+        order = np.argsort(np.concatenate([rows, short]), kind="stable")
+        rows = np.concatenate([rows, short])[order]
+        hashes = np.concatenate([hashes, pd.util.hash_array(texts)])[order]
+    return rows, hashes
+
+
+def has_text(descriptions):
+    """Mask of the descriptions that are real text rather than a placeholder for a missing one."""
+    return ~descriptions.str.strip().str.lower().isin(PLACEHOLDER_DESCRIPTIONS).to_numpy()
+
+
+def minhash_signatures(descriptions):
+    """MinHash signature of each description: per hash function, bits 32-47 of its smallest shingle hash.
+
+    Placeholder descriptions get an all-zero signature.
+    """
+    signatures = np.empty((len(descriptions), MINHASH_PERMUTATIONS), dtype=np.uint16)
+    for start in range(0, len(descriptions), SIGNATURE_CHUNK_ROWS):
+        rows, hashes = shingle_hashes(descriptions.iloc[start:start + SIGNATURE_CHUNK_ROWS])
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        for i, (multiplier, offset) in enumerate(zip(HASH_MULTIPLIERS, HASH_OFFSETS)):
+            # The minimum's high bits are all zero for long texts, so the stored bits are taken below them
+            minimums = np.minimum.reduceat(hashes * multiplier + offset, starts)
+            signatures[start:start + len(starts), i] = (minimums >> np.uint64(32)).astype(np.uint16)
+    signatures[~has_text(descriptions)] = 0
+    return signatures
+
+
+def cluster_representatives(rows, signatures):
+    """For sorted row ids and their signatures, the smallest row id of each row's near-duplicate cluster.
+
+    Each LSH bucket is linked to its first row only, so the candidate pairs grow linearly with the rows
+    instead of quadratically with the bucket sizes.
+    """
+    count = len(rows)
+    if not count:
+        return np.empty(0, dtype=np.int64)
+    band_keys = np.ascontiguousarray(signatures).view(np.uint64) # One 64-bit key per band of 4 values
+    members, heads = [], []
+    for band in range(band_keys.shape[1]):
+        order = np.argsort(band_keys[:, band], kind="stable") # Rows ascending within each bucket
+        keys = band_keys[order, band]
+        first = np.r_[True, keys[1:] != keys[:-1]]
+        bucket_heads = order[np.flatnonzero(first)][np.cumsum(first) - 1]
+        members.append(order[~first])
+        heads.append(bucket_heads[~first])
+    pairs = np.unique(np.concatenate(members).astype(np.int64) * count + np.concatenate(heads))
+
+    # Keep the candidates whose signatures agree often enough
+    similar = []
+    for start in range(0, len(pairs), VERIFY_CHUNK_PAIRS):
+        chunk = pairs[start:start + VERIFY_CHUNK_PAIRS]
+        agreement = (signatures[chunk // count] == signatures[chunk % count]).mean(axis=1)
+        similar.append(chunk[agreement >= DUPLICATE_THRESHOLD])
+    pairs = np.concatenate(similar) if similar else np.empty(0, dtype=np.int64)
+    graph = sparse.coo_matrix((np.ones(len(pairs), dtype=np.int8), (pairs // count, pairs % count)), shape=(count, count))
+    _, labels = connected_components(graph, directed=False)
+    smallest = np.full(labels.max() + 1 if count else 0, count, dtype=np.int64)
+    np.minimum.at(smallest, labels, np.arange(count))
+    return rows[smallest[labels]]
+
+
+class DuplicateIndex:
+    """MinHash signature of every posting and the earliest posting of its near-duplicate cluster."""
+
+    def __init__(self, signatures, duplicate_of):
+        self.signatures = signatures
+        self.duplicate_of = duplicate_of # Row id of the cluster's earliest posting; a posting's own id if it is unique
+        self.unique_rows = np.flatnonzero(duplicate_of == np.arange(len(duplicate_of)))
+
+    @classmethod
+    def build(cls, descriptions):
+        """Signs every description and clusters the near-duplicates. Postings without a description stay unique."""
+        signatures = minhash_signatures(descriptions)
+        duplicate_of = np.arange(len(descriptions))
+        texts = has_text(descriptions)
+        duplicate_of[texts] = cluster_representatives(duplicate_of[texts], signatures[texts])
+        index = cls(signatures, duplicate_of)
+        logging.info(f"Found {len(descriptions) - len(index.unique_rows)} near-duplicates among {len(descriptions)} postings.")
+        return index
+
+    @classmethod
+    def load_or_build(cls, df, fingerprint, path):
+        """Reuses the index saved at path for this data, or builds it and saves it there."""
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                if str(saved['fingerprint']) == fingerprint and 'version' in saved.files and int(saved['version']) == DEDUP_VERSION:
+                    logging.info(f"Loaded near-duplicate index from {path}.")
+                    return cls(saved['signatures'], saved['duplicate_of'])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Could not read near-duplicate index at {path}, rebuilding it: {e}")
+
+        index = cls.build(df['job_description'])
+        arrays = {'fingerprint': np.array(fingerprint), 'version': np.array(DEDUP_VERSION), 'signatures': index.signatures, 'duplicate_of': index.duplicate_of}
+        save_optional(path, lambda f: np.savez(f, **arrays), "near-duplicate index")
+        return index
+
+    def copy(self):
+        """An index sharing the arrays; append replaces them rather than writing to them, so this one is unaffected."""
+        return DuplicateIndex(self.signatures, self.duplicate_of)
+
+    def append(self, descriptions, first_row):
+        """Signs appended postings and matches them against each other and the existing postings.
+
+        Existing clusters are left as they are, even if a new posting is similar to two of them.
+        New postings without a description stay unique.
+        """
+        signatures = minhash_signatures(descriptions)
+        new_rows = np.arange(first_row, first_row + len(descriptions))
+        texts = has_text(descriptions)
+        # Existing postings sharing a band with a new one are the only ones that can match it. The zero
+        # signatures of existing postings without a description share no band with real text.
+        existing_keys = self.signatures.view(np.uint64)
+        new_keys = signatures[texts].view(np.uint64)
+        matched = np.zeros(len(existing_keys), dtype=bool)
+        for band in range(new_keys.shape[1]):
+            matched |= np.isin(existing_keys[:, band], new_keys[:, band])
+        candidates = np.flatnonzero(matched)
+
+        representatives = new_rows.copy()
+        representatives[texts] = cluster_representatives(
+            np.concatenate([candidates, new_rows[texts]]), np.concatenate([self.signatures[candidates], signatures[texts]]),
+        )[len(candidates):]
+        # A new posting matched to an existing one joins that posting's cluster
+        existing = representatives < first_row
+        representatives[existing] = self.duplicate_of[representatives[existing]]
+        self.signatures = np.concatenate([self.signatures, signatures])
+        self.duplicate_of = np.concatenate([self.duplicate_of, representatives])
+        self.unique_rows = np.concatenate([self.unique_rows, new_rows[representatives == new_rows]])
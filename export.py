@@ -0,0 +1,174 @@
+"""Chunked export of a row selection to CSV, Parquet or Excel files, written on background threads."""
+import os
+import re
+import time
+import uuid
+import shutil
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# --- Constants ---
+EXPORT_FORMATS = {'CSV': 'csv', 'Parquet': 'parquet', 'Excel': 'xlsx'} # Offered formats and their file extensions
+EXPORT_CHUNK_ROWS = 50_000 # Rows gathered from the frame and written per step, so an export never copies the whole selection
+EXPORT_WORKERS = 2 # Exports written at the same time across all sessions; further ones wait for a free worker
+EXPORT_MAX_AGE_SECONDS = 3600 # Finished export files older than this are deleted when the next export starts
+EXPORT_HIDDEN_COLUMNS = ['posting_hash'] # Internal columns left out of exports
+EXCEL_MAX_ROWS = 1_048_575 # Data rows per worksheet: Excel's row limit minus the header row
+EXCEL_MAX_CELL_CHARS = 32_767 # Longer text is cut, Excel refuses it otherwise
+EXCEL_ILLEGAL_CHARACTERS = re.compile(r"[\000-\010]|[\013-\014]|[\016-\037]") # Control characters XML cannot hold
+
+_executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="export") # Shared by all sessions
+
+
+def export_chunks(df, rows, columns):
+    """The exported columns of the given row ids (None for all rows), EXPORT_CHUNK_ROWS rows at a time."""
+    rows = np.arange(len(df)) if rows is None else rows
+    frame = df[columns] # Column selection only, rows are gathered chunk by chunk
+    for start in range(0, max(len(rows), 1), EXPORT_CHUNK_ROWS): # An empty selection still gets its header
+        yield frame.take(rows[start:start + EXPORT_CHUNK_ROWS])
+
+
+def write_csv(chunks, path):
+    """Appends each chunk to one CSV file, with the header written once."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, index=False, header=i == 0)
+            yield len(chunk)
+
+
+def write_parquet(chunks, path):
+    """Writes each chunk as a row group of one Parquet file. Categorical columns stay dictionary-encoded."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            yield len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def excel_values(chunk):
+    """Chunk converted to what openpyxl can write: plain objects, None for missing values and sanitized text."""
+    values = chunk.astype(object)
+    for col in chunk.columns:
+        if not (pd.api.types.is_numeric_dtype(chunk[col]) or pd.api.types.is_datetime64_any_dtype(chunk[col])):
+            values[col] = values[col].str.replace(EXCEL_ILLEGAL_CHARACTERS, "", regex=True).str.slice(0, EXCEL_MAX_CELL_CHARS)
+    return values.where(chunk.notna(), None)
+
+
+def write_excel(chunks, path):
+    """Streams the chunks into a write-only workbook, continuing on a new sheet whenever one is full."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True) # Rows go straight to a temporary file instead of a cell tree in memory
+    sheet, sheet_rows = None, 0
+    for chunk in chunks:
+        values = excel_values(chunk)
+        start = 0
+        while sheet is None or start < len(values):
+            if sheet is None or sheet_rows == EXCEL_MAX_ROWS:
+                sheet = workbook.create_sheet(f"Postings {len(workbook.sheetnames) + 1}" if workbook.sheetnames else "Postings")
+                sheet.append(list(values.columns))
+                sheet_rows = 0
+            part = values.iloc[start:start + EXCEL_MAX_ROWS - sheet_rows]
+            for row in part.itertuples(index=False, name=None):
+                sheet.append(row)
+            sheet_rows += len(part)
+            start += len(part)
+        yield len(chunk)
+    workbook.save(path)
+
+
+EXPORT_WRITERS = {'csv': write_csv, 'parquet': write_parquet, 'xlsx': write_excel}
+
+
+class ExportJob:
+    """One export being written in the background: its progress, and the finished file or the error."""
+
+    def __init__(self, key, total_rows, path, file_name):
+        self.key = key # What was exported, so the page only offers the file for the selection it was made for
+        self.total_rows = total_rows
+        self.path = path
+        self.file_name = file_name
+        self.rows_written = 0
+        self.cancelled = False
+        self.future = None
+
+    @property
+    def progress(self):
+        """Share of the rows written so far."""
+        return self.rows_written / self.total_rows if self.total_rows else 1.0
+
+    def done(self):
+        return self.future.done()
+
+    def error(self):
+        """The exception the export failed with, or None."""
+        return self.future.exception() if self.future.done() else None
+
+    def discard(self):
+        """Deletes the file once it is no longer offered. An export still being written stops after its current chunk."""
+        self.cancelled = True
+        if self.future.done():
+            shutil.rmtree(os.path.dirname(self.path), ignore_errors=True)
+
+
+def run_export(job, df, rows, columns, extension):
+    """Writes the export under a temporary name and moves it into place once it is complete."""
+    started = time.perf_counter()
+    partial = job.path + ".tmp"
+    writes = EXPORT_WRITERS[extension](export_chunks(df, rows, columns), partial)
+    try:
+        for written in writes:
+            if job.cancelled:
+                logging.info(f"Export to {job.path} discarded after {job.rows_written} rows.")
+                return None
+            job.rows_written += written
+        os.replace(partial, job.path)
+    except Exception:
+        logging.exception(f"Export to {job.path} failed.")
+        job.cancelled = True
+        raise
+    finally:
+        writes.close() # Closes the file of an export that stopped early, so its folder can go
+        if job.cancelled:
+            shutil.rmtree(os.path.dirname(job.path), ignore_errors=True)
+    logging.info(f"Exported {job.rows_written} rows to {job.path} in {time.perf_counter() - started:.1f} s.")
+    return job.path
+
+
+def remove_old_exports(directory):
+    """Deletes export folders older than EXPORT_MAX_AGE_SECONDS."""
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if entry.is_dir() and time.time() - entry.stat().st_mtime > EXPORT_MAX_AGE_SECONDS:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def start_export(key, df, rows, export_format, directory, file_stem):
+    """Queues the export of the given row ids (None for all rows) and returns its job right away.
+
+    Each export gets its own folder with an unguessable name, so its file can be served as is.
+    """
+    remove_old_exports(directory)
+    extension = EXPORT_FORMATS[export_format]
+    folder = os.path.join(directory, uuid.uuid4().hex)
+    os.makedirs(folder, exist_ok=True)
+    file_name = f"{file_stem}.{extension}"
+    columns = [col for col in df.columns if col not in EXPORT_HIDDEN_COLUMNS]
+    job = ExportJob(key, len(df) if rows is None else len(rows), os.path.join(folder, file_name), file_name)
+    job.future = _executor.submit(run_export, job, df, rows, columns, extension)
+    return job
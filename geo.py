@@ -0,0 +1,35 @@
+"""US state boundaries bundled with the dashboard, and matching of the data's state labels to them."""
+import os
+import json
+import logging
+from functools import lru_cache
+
+import pandas as pd
+
+# US Census 2016 cartographic state boundaries (1:500k), simplified for the dashboard: Douglas-Peucker at
+# 0.02 degrees, coordinates rounded to 3 decimals and islands under 0.005 square degrees dropped.
+# Features are keyed by postal code and named in properties.name. Bundled so the map needs no network.
+STATE_SHAPES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "geodata", "us_states.geojson")
+
+
+@lru_cache(maxsize=None)
+def load_state_shapes(path=STATE_SHAPES_PATH):
+    """The state boundaries as a GeoJSON dict, read once per process and shared by every map."""
+    with open(path, "r", encoding="utf-8") as f:
+        shapes = json.load(f)
+    logging.info(f"Loaded {len(shapes['features'])} state boundaries from {path}.")
+    return shapes
+
+
+def state_codes(labels, shapes):
+    """Postal code of each state label, matched case-insensitively by code ("ca") or name ("California").
+
+    Labels that are no state on the map ("Remote", "Unknown") get None.
+    """
+    lookup = {}
+    for feature in shapes['features']:
+        lookup[feature['id'].lower()] = feature['id']
+        lookup[feature['properties']['name'].lower()] = feature['id']
+    labels = pd.Index(labels, dtype=object).astype(str)
+    codes = pd.Series(labels.str.strip().str.lower(), index=labels).map(lookup)
+    return codes.astype(object).where(codes.notna(), None)
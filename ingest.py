@@ -0,0 +1,326 @@
+"""Streamlit-free parsing and cleaning of the job postings CSV files."""
+import io
+import os
+import re
+import sys
+import types
+import glob
+import json
+import hashlib
+import logging
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+# --- Columns ---
+DIMENSION_COLUMNS = ['category', 'state', 'job_title', 'company_name', 'job_type'] # Stored as categoricals
+DERIVED_DIMENSION_COLUMNS = ['canonical_title'] # Categoricals added after loading, see titles.py
+TEXT_COLUMNS = ['job_description'] # Free text, stored as plain strings
+POSTING_KEY_COLUMNS = ['job_title', 'company_name', 'state', 'job_description'] # Identify a posting across files
+POSTING_DATE_COLUMNS = ['date_posted', 'posted_date', 'posting_date'] # The first one present becomes posting_date
+SALARY_COLUMNS = ['salary', 'salary_range', 'pay'] # The first one present is parsed into annual_salary
+
+# --- Posting Dates ---
+POSTING_DATE_EARLIEST = pd.Timestamp("2000-01-01") # Earlier dates are placeholders or typos and dropped
+POSTING_DATE_MAX_AHEAD_DAYS = 31 # Dates further past the day of cleaning are typos (such as 9999-12-31) and dropped
+
+# --- Salary Parsing ---
+# "$50,000 - $70,000 a year", "$25.50 an hour", "From $4,000 a month", "Up to $90K": the first amount and an
+# optional second one after a dash or "to", each with an optional K for thousands
+SALARY_AMOUNT_PATTERN = r"\$?\s*(\d[\d,]*(?:\.\d+)?)\s*(k\b)?"
+SALARY_RANGE_PATTERN = SALARY_AMOUNT_PATTERN + r"(?:\s*(?:-|–|to)\s*" + SALARY_AMOUNT_PATTERN + ")?"
+# Pay periods named in the text, as multiples per year
+SALARY_PERIODS = {
+    'hour': 2080, 'hr': 2080, 'day': 260, 'daily': 260, 'week': 52, 'month': 12, 'year': 1, 'yr': 1, 'annual': 1, 'annum': 1,
+}
+SALARY_PERIOD_PATTERN = r"(?<![a-z])(" + "|".join(SALARY_PERIODS) + ")"
+# Without a period the amount decides: below the first bound it is hourly, below the second monthly, else yearly
+SALARY_HOURLY_BELOW = 300
+SALARY_MONTHLY_BELOW = 20_000
+SALARY_ANNUAL_RANGE = (1_000, 10_000_000) # Annualized values outside this range are parsing noise and dropped
+
+# --- Job Type Rules ---
+# Checked in order against the lowercased raw job_type; the first matching label wins
+JOB_TYPE_RULES = {
+    'Full-time': ['full-time', 'full time'],
+    'Part-time': ['part-time', 'part time'],
+    'Contract': ['contract'],
+    'Internship': ['internship'],
+    'Temporary': ['temporary'],
+}
+JOB_TYPE_OTHER = 'Other/Unspecified' # Catch-all
+
+# --- Streaming Ingest ---
+# CSVs are parsed in chunks straight off the network or disk so a raw file is never held in memory
+INGEST_MEMORY_BUDGET_MB = int(os.environ.get("JOBS_INGEST_MEMORY_MB", "512")) # Peak memory allowed for the cleaned frame
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024 # Bytes requested from the network per read
+INITIAL_CHUNK_ROWS = 10_000 # Rows in the first parsed chunk, later chunks are sized from the budget
+CHUNK_BUDGET_FRACTION = 0.1 # Share of the budget a single parsed chunk may use
+
+# --- Sharded Sources ---
+INGEST_WORKERS = int(os.environ.get("JOBS_INGEST_WORKERS", os.cpu_count() or 1)) # Processes parsing shards in parallel
+SHARD_PATTERNS = ("*.csv", "*.csv.gz") # Files picked up when the source is a directory
+MANIFEST_SUFFIXES = (".txt", ".json") # Files listing shard paths or URLs
+
+
+# --- Cleaning ---
+def clean_data(df):
+    """Applies the basic cleaning (missing values, categorical dimensions) to a freshly parsed frame."""
+    for col in TEXT_COLUMNS + DIMENSION_COLUMNS:
+        if col in df.columns:
+            # Fill NA before converting so missing values become 'Unknown' instead of the string 'nan'
+            df[col] = df[col].fillna('Unknown').astype(str)
+    # Dictionary-encode the low-cardinality dimensions: small integer codes plus one copy of each label
+    for col in DIMENSION_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    if 'job_type' in df.columns:
+        df['job_type_category'] = normalize_job_types(df['job_type'])
+    # Day each posting went up, for the trend rollups; dates that do not parse or are implausible stay empty (NaT)
+    date_column = next((col for col in POSTING_DATE_COLUMNS if col in df.columns), None)
+    if date_column is not None:
+        dates = pd.to_datetime(df.pop(date_column), errors='coerce')
+        dates = (dates.dt.tz_localize(None) if dates.dt.tz is not None else dates).dt.normalize()
+        latest = pd.Timestamp.now().normalize() + pd.Timedelta(days=POSTING_DATE_MAX_AHEAD_DAYS)
+        df['posting_date'] = dates.where(dates.between(POSTING_DATE_EARLIEST, latest))
+    # Annualized pay for the salary charts; text without a usable amount stays empty (NaN)
+    salary_column = next((col for col in SALARY_COLUMNS if col in df.columns), None)
+    if salary_column is not None:
+        df['annual_salary'] = annualize_salaries(df.pop(salary_column))
+    # Stable 64-bit identity of each posting, hashed from the values (not the codes) of the key columns
+    key_columns = [col for col in POSTING_KEY_COLUMNS if col in df.columns]
+    df['posting_hash'] = pd.util.hash_pandas_object(df[key_columns], index=False).to_numpy()
+    logging.info("Performed basic data cleaning (fillna, categorical dimensions, job types).")
+    return df
+
+
+def normalize_job_types(job_type):
+    """Maps a categorical job_type column to the JOB_TYPE_RULES labels, classifying each distinct raw value once."""
+    labels = list(JOB_TYPE_RULES) + [JOB_TYPE_OTHER]
+    levels = job_type.cat.categories.str.lower()
+    conditions = [
+        levels.str.contains("|".join(re.escape(pattern) for pattern in patterns), regex=True)
+        for patterns in JOB_TYPE_RULES.values()
+    ]
+    # Label code per raw level, then looked up by each row's raw code
+    level_codes = np.select(conditions, np.arange(len(JOB_TYPE_RULES)), default=len(JOB_TYPE_RULES))
+    return pd.Categorical.from_codes(level_codes[job_type.cat.codes.to_numpy()], categories=labels)
+
+
+def parse_salaries(texts):
+    """Annual salary of each salary text, the midpoint for ranges, or NaN if it holds no usable amount."""
+    text = pd.Series(texts, dtype=object).astype(str).str.lower()
+    amounts = text.str.extract(SALARY_RANGE_PATTERN)
+    thousands = [np.where(amounts[col].notna(), 1000.0, 1.0) for col in (1, 3)]
+    low = pd.to_numeric(amounts[0].str.replace(",", "", regex=False), errors='coerce') * thousands[0]
+    high = pd.to_numeric(amounts[2].str.replace(",", "", regex=False), errors='coerce') * thousands[1]
+    amount = ((low + high.fillna(low)) / 2).to_numpy(dtype=np.float64)
+    per_year = text.str.extract(SALARY_PERIOD_PATTERN)[0].map(SALARY_PERIODS).to_numpy(dtype=np.float64)
+    inferred = np.select([amount < SALARY_HOURLY_BELOW, amount < SALARY_MONTHLY_BELOW], [SALARY_PERIODS['hour'], SALARY_PERIODS['month']], 1)
+    annual = amount * np.where(np.isnan(per_year), inferred, per_year)
+    low_bound, high_bound = SALARY_ANNUAL_RANGE
+    return np.where((annual >= low_bound) & (annual <= high_bound), annual, np.nan)
+
+
+def annualize_salaries(salaries):
+    """Annual salary per row of a raw salary column as float32, parsing each distinct text once."""
+    codes, texts = pd.factorize(salaries)
+    parsed = np.append(parse_salaries(texts), np.nan) # Code -1 (missing) picks the trailing NaN
+    return parsed[codes].astype(np.float32)
+
+
+def concat_chunks(chunks):
+    """Concatenates cleaned chunks, giving every categorical dimension one shared, sorted set of levels."""
+    for col in DIMENSION_COLUMNS:
+        if col in chunks[0].columns:
+            levels = sorted(set().union(*(chunk[col].cat.categories for chunk in chunks)))
+            for chunk in chunks:
+                chunk[col] = chunk[col].cat.set_categories(levels)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def align_categories(frame, reference):
+    """Gives frame's categorical dimensions the levels of reference, which must include all of frame's values."""
+    frame = frame.copy()
+    for col in DIMENSION_COLUMNS + DERIVED_DIMENSION_COLUMNS:
+        if col in frame.columns:
+            frame[col] = frame[col].cat.set_categories(reference[col].cat.categories)
+    return frame
+
+
+def append_rows(df, rows):
+    """Appends cleaned rows to df. New levels go after the existing ones, so existing codes stay valid.
+
+    Columns that rows does not have are left empty (missing values) in the appended rows.
+    """
+    df = df.copy(deep=False)
+    for col in DIMENSION_COLUMNS + DERIVED_DIMENSION_COLUMNS:
+        if col in df.columns and col in rows.columns:
+            new_levels = rows[col].cat.categories.difference(df[col].cat.categories)
+            if len(new_levels):
+                df[col] = df[col].cat.add_categories(new_levels)
+    return pd.concat([df, align_categories(rows, df)], ignore_index=True)
+
+
+# --- Streaming Ingest ---
+class ResponseStream(io.RawIOBase):
+    """Read-only file object over a streamed HTTP response that hashes the bytes as they pass through."""
+
+    def __init__(self, response, hasher):
+        self._chunks = response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES)
+        self._hasher = hasher
+        self._pending = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            try:
+                self._pending = next(self._chunks)
+            except StopIteration:
+                return 0 # End of stream
+            self._hasher.update(self._pending)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def read_csv_streaming(response, hasher, budget_bytes=None):
+    """Parses a streamed CSV response chunk by chunk, hashing the bytes as they are read."""
+    stream = io.BufferedReader(ResponseStream(response, hasher), buffer_size=DOWNLOAD_CHUNK_BYTES)
+    return read_csv_chunked(stream, budget_bytes)
+
+
+def read_csv_chunked(source, budget_bytes=None):
+    """Parses a CSV path or binary stream chunk by chunk, cleaning each chunk, within the memory budget."""
+    if budget_bytes is None:
+        budget_bytes = INGEST_MEMORY_BUDGET_MB * 1024 * 1024
+    reader = pd.read_csv(source, iterator=True)
+
+    chunks = []
+    total_bytes = 0
+    chunk_rows = INITIAL_CHUNK_ROWS
+    while True:
+        try:
+            chunk = reader.get_chunk(chunk_rows)
+        except StopIteration:
+            break
+        chunk = clean_data(chunk)
+        chunk_bytes = int(chunk.memory_usage(deep=True).sum())
+        total_bytes += chunk_bytes
+        # Concatenating briefly holds the chunks and the final frame at the same time
+        if 2 * total_bytes > budget_bytes:
+            raise MemoryError(
+                f"Dataset exceeds the ingest memory budget of {budget_bytes / 1024 / 1024:.0f} MB "
+                f"after {sum(len(c) for c in chunks) + len(chunk):,} rows. Raise JOBS_INGEST_MEMORY_MB to load it."
+            )
+        chunks.append(chunk)
+        # Size the next chunk from the observed cleaned bytes per row
+        bytes_per_row = max(chunk_bytes / max(len(chunk), 1), 1)
+        chunk_rows = max(1_000, int(budget_bytes * CHUNK_BUDGET_FRACTION / bytes_per_row))
+
+    if not chunks:
+        raise pd.errors.EmptyDataError("No rows in CSV")
+    df = concat_chunks(chunks)
+    logging.info(f"Parsed CSV in {len(chunks)} chunks. Cleaned frame uses {total_bytes / 1024 / 1024:.1f} MB.")
+    return df
+
+
+# --- Sharded Sources ---
+def is_remote(source):
+    """True for http(s) URLs, False for local paths."""
+    return source.startswith(("http://", "https://"))
+
+
+def discover_shards(source):
+    """Lists the shards of a source: a directory of CSVs, a manifest of paths/URLs, or a single file, in a fixed order."""
+    if os.path.isdir(source):
+        shards = set()
+        for pattern in SHARD_PATTERNS:
+            shards.update(glob.glob(os.path.join(source, "**", pattern), recursive=True))
+        shards = sorted(shards) # Sorted paths give a deterministic merge order
+    elif source.endswith(MANIFEST_SUFFIXES):
+        with open(source, "r", encoding="utf-8") as f:
+            if source.endswith(".json"):
+                entries = json.load(f)
+                entries = entries.get("shards", []) if isinstance(entries, dict) else entries
+            else:
+                entries = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        # Relative paths in a manifest are relative to the manifest itself
+        base_dir = os.path.dirname(os.path.abspath(source))
+        shards = [entry if is_remote(entry) else os.path.join(base_dir, entry) for entry in entries]
+    else:
+        shards = [source]
+    if not shards:
+        raise pd.errors.EmptyDataError(f"No CSV shards found in {source}")
+    return shards
+
+
+def shards_fingerprint(shards):
+    """Hash of the shard list with each local file's size and modification time, or None if any shard is remote."""
+    if any(is_remote(shard) for shard in shards):
+        return None # Remote shards can only be checked by downloading them
+    hasher = hashlib.sha256()
+    for shard in shards:
+        stat = os.stat(shard)
+        hasher.update(f"{shard}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return hasher.hexdigest()
+
+
+def parse_shard(shard, budget_bytes):
+    """Parses and cleans one shard (runs in a worker process). Returns None for a shard without rows."""
+    try:
+        if is_remote(shard):
+            with requests.get(shard, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                return read_csv_streaming(response, hashlib.sha256(), budget_bytes)
+        return read_csv_chunked(shard, budget_bytes)
+    except pd.errors.EmptyDataError:
+        logging.warning(f"Shard {shard} has no rows, skipping it.")
+        return None
+
+
+@contextlib.contextmanager
+def main_module_hidden():
+    """Hides the running script from spawned workers, which would otherwise re-run it (Streamlit runs app.py as __main__)."""
+    main_module = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main_module
+
+
+def read_shards(shards, workers=INGEST_WORKERS):
+    """Parses the shards in parallel worker processes and merges them, in shard order, into one frame."""
+    budget_bytes = INGEST_MEMORY_BUDGET_MB * 1024 * 1024
+    workers = max(1, min(workers, len(shards)))
+    if workers == 1:
+        frames = [parse_shard(shard, budget_bytes) for shard in shards]
+    else:
+        # Spawned workers start clean instead of forking the threads of a running server.
+        # Each gets an equal share of the budget, so together they stay within it.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            with main_module_hidden(): # All workers are started by the first submit
+                futures = [pool.submit(parse_shard, shard, budget_bytes // workers) for shard in shards]
+            frames = [future.result() for future in futures] # Results in shard order
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        raise pd.errors.EmptyDataError("No rows in any CSV shard")
+
+    total_bytes = sum(int(frame.memory_usage(deep=True).sum()) for frame in frames)
+    if 2 * total_bytes > budget_bytes: # The merge briefly holds the shards and the result
+        raise MemoryError(
+            f"Dataset exceeds the ingest memory budget of {INGEST_MEMORY_BUDGET_MB} MB "
+            f"across {len(frames)} shards. Raise JOBS_INGEST_MEMORY_MB to load it."
+        )
+    df = concat_chunks(frames)
+    logging.info(f"Merged {len(frames)} shards using {workers} worker processes. Shape: {df.shape}")
+    return df
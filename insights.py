@@ -0,0 +1,88 @@
+"""Summary insights for a filter selection, worded from its already computed metrics and skill counts."""
+from dataclasses import dataclass
+
+TOP_EMPLOYERS_SHOWN = 3
+TOP_SKILLS_SHOWN = 3
+DOMINANT_SHARE = 0.5 # Share of the selection from which the largest group is called dominant
+
+
+@dataclass(frozen=True)
+class Insight:
+    """One summary point. The text has a {} placeholder for each highlighted value, in order."""
+    title: str
+    text: str
+    values: tuple
+
+
+def share(count, total):
+    """count / total as a percentage label."""
+    return f"{count / total:.0%}" if total else "0%"
+
+
+def counted(count, noun, plural):
+    """'1 employer' or '5 employers'."""
+    return f"{count:,} {noun if count == 1 else plural}"
+
+
+def join_labels(labels):
+    """'a', 'a and b' or 'a, b and c' placeholders for the given number of labels."""
+    return "{}" if labels == 1 else ", ".join(["{}"] * (labels - 1)) + " and {}"
+
+
+def build_insights(metrics, skill_counts, dataset_postings):
+    """Summary points for a selection from its DashboardMetrics and top skill counts, without touching any rows.
+
+    dataset_postings is the number of postings in the whole (unfiltered) dataset.
+    """
+    total = metrics.total_postings
+    insights = [Insight(
+        "Market Volume",
+        "The current selection holds {}, {} of the dataset, spread over {} and {}.",
+        (counted(total, "job posting", "job postings"), share(total, dataset_postings),
+         counted(metrics.unique_categories, "job category", "job categories"),
+         counted(metrics.unique_companies, "employer", "employers")),
+    )]
+
+    if not metrics.category_counts.empty:
+        top_count = int(metrics.category_counts.iloc[0])
+        wording = "dominates" if top_count / total >= DOMINANT_SHARE else "leads"
+        text = f"The {{}} category {wording} with {{}} of postings"
+        values = [metrics.top_category, share(top_count, total)]
+        if len(metrics.category_counts) > 1:
+            text += ", followed by {} with {}"
+            values += [metrics.category_counts.index[1], share(int(metrics.category_counts.iloc[1]), total)]
+        insights.append(Insight("Dominant Sector", text + ".", tuple(values)))
+
+    if not metrics.title_counts.empty:
+        insights.append(Insight(
+            "Key Role",
+            "{} is the most common role with {} ({} of the selection), among {}.",
+            (metrics.top_title, counted(int(metrics.title_counts.iloc[0]), "posting", "postings"),
+             share(int(metrics.title_counts.iloc[0]), total), counted(metrics.unique_titles, "distinct job title", "distinct job titles")),
+        ))
+
+    employers = metrics.company_counts.head(TOP_EMPLOYERS_SHOWN)
+    if not employers.empty:
+        insights.append(Insight(
+            "Leading Employers",
+            f"The most active employers are {join_labels(len(employers))}, together posting {{}} of the selection.",
+            (*employers.index, share(int(employers.sum()), total)),
+        ))
+
+    skills = skill_counts.head(TOP_SKILLS_SHOWN)
+    if not skills.empty:
+        insights.append(Insight(
+            "Critical Skill Sets",
+            f"The most requested skills are {join_labels(len(skills))}; {{}} is mentioned in {{}} of postings.",
+            (*skills.index, skills.index[0], share(int(skills.iloc[0]), total)),
+        ))
+
+    if not metrics.job_type_counts.empty:
+        job_types = metrics.job_type_counts
+        text = "{} positions make up {} of postings"
+        values = [job_types.index[0], share(int(job_types.iloc[0]), total)]
+        if len(job_types) > 1:
+            text += ", {} positions {}"
+            values += [job_types.index[1], share(int(job_types.iloc[1]), total)]
+        insights.append(Insight("Employment Type Mix", text + ".", tuple(values)))
+    return insights
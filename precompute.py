@@ -0,0 +1,48 @@
+"""Precomputes the dashboard's KPIs and top-N tables for every (category, state) filter pair.
+
+Run it nightly, after new data lands, so the dashboard serves these results instead of computing them:
+
+    python precompute.py --workers 8
+"""
+import argparse
+import logging
+import sys
+
+from analytics import (
+    INGEST_WORKERS,
+    RESULTS_PATH,
+    JobData,
+    load_source,
+    precompute_results,
+    read_snapshot_meta,
+    write_results,
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute dashboard results for every (category, state) filter pair.")
+    parser.add_argument("--output", default=RESULTS_PATH, help=f"results file to write (default: {RESULTS_PATH})")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    try:
+        data = JobData(load_source(read_snapshot_meta()))
+        # Include the pending delta files, as the dashboard applies them right after loading
+        new_postings, changed_postings = data.refresh(force=True)
+        if new_postings or changed_postings:
+            logging.info(f"Applied deltas: {new_postings:,} new and {changed_postings:,} changed postings.")
+        results = precompute_results(data.state, args.workers)
+        write_results(results, data.state.fingerprint, args.output)
+    except Exception as e:
+        logging.exception(f"Precomputing results failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Section-by-section timing and memory instrumentation of a dashboard run, logged as JSON records."""
+import os
+import json
+import time
+import uuid
+import logging
+import tracemalloc
+
+import pandas as pd
+
+# Tracing allocations slows every section down, so peak memory is only recorded when asked for
+PROFILE_MEMORY = os.environ.get("JOBS_PROFILE_MEMORY", "0") == "1"
+PROFILE_LOGGER = logging.getLogger("profile") # One JSON object per record, for log shipping and grep
+
+if PROFILE_MEMORY and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+class RunProfile:
+    """Wall time, CPU time, peak allocation and row count of each section of one script run.
+
+    The script is flat, so sections are marked where they start: each call to section() ends the previous one.
+    """
+
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:12] # Ties the records of one rerun together in the logs
+        self.records = []
+        self._current = None
+        self._run_started = time.perf_counter()
+
+    def section(self, name):
+        """Ends the current section, if any, and starts measuring the next one."""
+        self._end_section()
+        if tracemalloc.is_tracing():
+            # The peak is process-wide, so sessions running at the same time inflate each other's numbers
+            tracemalloc.reset_peak()
+        self._current = {
+            'section': name,
+            'rows': None,
+            'wall_started': time.perf_counter(),
+            'cpu_started': time.thread_time(), # Streamlit runs each session's script in its own thread
+            'traced_started': tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+        }
+
+    def set_rows(self, rows):
+        """Records how many rows the current section worked on."""
+        if self._current is not None:
+            self._current['rows'] = int(rows)
+
+    def _end_section(self):
+        if self._current is None:
+            return
+        current, self._current = self._current, None
+        peak_bytes = None
+        if current['traced_started'] is not None and tracemalloc.is_tracing():
+            peak_bytes = max(tracemalloc.get_traced_memory()[1] - current['traced_started'], 0)
+        record = {
+            'section': current['section'],
+            'wall_ms': round((time.perf_counter() - current['wall_started']) * 1000, 2),
+            'cpu_ms': round((time.thread_time() - current['cpu_started']) * 1000, 2),
+            'peak_bytes': peak_bytes,
+            'rows': current['rows'],
+        }
+        self.records.append(record)
+        PROFILE_LOGGER.info(json.dumps({'event': 'section', 'run_id': self.run_id, **record}))
+
+    def finish(self):
+        """Ends the last section and logs a summary record for the whole run."""
+        self._end_section()
+        total_ms = round((time.perf_counter() - self._run_started) * 1000, 2)
+        slowest = max(self.records, key=lambda record: record['wall_ms'], default=None)
+        PROFILE_LOGGER.info(json.dumps({
+            'event': 'run',
+            'run_id': self.run_id,
+            'wall_ms': total_ms,
+            'sections': len(self.records),
+            'slowest_section': slowest['section'] if slowest else None,
+        }))
+        return total_ms
+
+    def to_frame(self):
+        """The finished sections as a table for display."""
+        frame = pd.DataFrame(self.records, columns=['section', 'wall_ms', 'cpu_ms', 'peak_bytes', 'rows'])
+        frame['peak_bytes'] = frame['peak_bytes'].astype(float) / 1024 / 1024
+        frame['rows'] = frame['rows'].astype('Int64') # Sections without a row count stay empty
+        return frame.rename(columns={
+            'section': 'Section', 'wall_ms': 'Wall (ms)', 'cpu_ms': 'CPU (ms)', 'peak_bytes': 'Peak (MB)', 'rows': 'Rows',
+        })
@@ -0,0 +1,189 @@
+"""Inverted index over posting titles and descriptions with BM25-ranked AND and phrase queries."""
+import re
+import logging
+
+import numpy as np
+import pandas as pd
+
+from storage import save_optional
+
+TOKEN_PATTERN = re.compile(r"\w+(?:[.+#]+\w+)*[+#]*") # Keeps terms like "c++", "c#" and "node.js" whole
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+BUILD_CHUNK_ROWS = 50_000 # Postings tokenized per step while building, to bound the temporary token lists
+BM25_K1 = 1.2 # Term frequency saturation
+BM25_B = 0.75 # Document length normalization
+
+
+def tokenize(text):
+    """Lowercased search terms of a text."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def parse_query(query):
+    """Splits a query into its required terms and its quoted phrases (as term lists)."""
+    phrases = [tokenize(phrase) for phrase in PHRASE_PATTERN.findall(query)]
+    terms = tokenize(PHRASE_PATTERN.sub(" ", query).replace('"', " "))
+    terms = list(dict.fromkeys(terms + [term for phrase in phrases for term in phrase])) # Drop duplicates, keep order
+    return terms, [phrase for phrase in phrases if len(phrase) > 1] # A one-word phrase is just a term
+
+
+def posting_texts(titles, descriptions):
+    """The searchable text of each posting: its title followed by its description."""
+    return titles.astype(str) + " " + descriptions
+
+
+class SearchSegment:
+    """Inverted index over a contiguous range of rows: per term, the sorted row ids holding it and their frequencies."""
+
+    def __init__(self, vocabulary, indptr, rows, freqs, doc_lengths, first_row):
+        self.vocabulary = vocabulary # pd.Index of terms; a term's position is its id
+        self.indptr = indptr # Postings of term i are rows[indptr[i]:indptr[i + 1]]
+        self.rows = rows
+        self.freqs = freqs
+        self.doc_lengths = doc_lengths # Terms per posting, for BM25 length normalization
+        self.first_row = first_row
+
+    @classmethod
+    def build(cls, titles, descriptions, first_row=0):
+        """Tokenizes the postings chunk by chunk and collects one (term, row, frequency) posting per distinct pair."""
+        term_ids = {}
+        keys, counts, doc_lengths = [], [], []
+        for start in range(0, len(descriptions), BUILD_CHUNK_ROWS):
+            texts = posting_texts(titles.iloc[start:start + BUILD_CHUNK_ROWS], descriptions.iloc[start:start + BUILD_CHUNK_ROWS])
+            tokens = texts.str.lower().str.findall(TOKEN_PATTERN).reset_index(drop=True)
+            doc_lengths.append(tokens.str.len().to_numpy(dtype=np.int32))
+            tokens = tokens.explode().dropna()
+            codes, uniques = pd.factorize(tokens)
+            # Chunk-local term codes to ids in the shared vocabulary
+            ids = np.fromiter((term_ids.setdefault(term, len(term_ids)) for term in uniques), dtype=np.int64, count=len(uniques))
+            chunk_keys, chunk_counts = np.unique(
+                (ids[codes] << 32) | (tokens.index.to_numpy(dtype=np.int64) + start + first_row), return_counts=True,
+            )
+            keys.append(chunk_keys)
+            counts.append(chunk_counts)
+
+        keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.int64)
+        order = np.argsort(keys, kind="stable") # Term-major, rows ascending within each term
+        keys = keys[order]
+        terms = keys >> 32
+        indptr = np.zeros(len(term_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(term_ids)), out=indptr[1:])
+        return cls(
+            vocabulary=pd.Index(list(term_ids), dtype=object),
+            indptr=indptr,
+            rows=(keys & 0xFFFFFFFF).astype(np.int32),
+            freqs=np.concatenate(counts)[order].astype(np.int32) if counts else np.empty(0, dtype=np.int32),
+            doc_lengths=np.concatenate(doc_lengths) if doc_lengths else np.empty(0, dtype=np.int32),
+            first_row=first_row,
+        )
+
+    def postings(self, term):
+        """(rows, frequencies) of a term, empty if the segment does not contain it."""
+        term_id = self.vocabulary.get_indexer([term])[0]
+        if term_id < 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+        start, end = self.indptr[term_id], self.indptr[term_id + 1]
+        return self.rows[start:end], self.freqs[start:end]
+
+    def save(self, f, fingerprint):
+        """Writes the segment and the data fingerprint it was built for to the binary file f."""
+        vocabulary = np.frombuffer("\n".join(self.vocabulary).encode(), dtype=np.uint8) # Terms never contain newlines
+        np.savez(
+            f, fingerprint=np.array(fingerprint), vocabulary=vocabulary, indptr=self.indptr, rows=self.rows,
+            freqs=self.freqs, doc_lengths=self.doc_lengths, first_row=np.array(self.first_row),
+        )
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """Reads a saved segment if it was built for the data with this fingerprint, otherwise returns None."""
+        with np.load(path, allow_pickle=False) as saved:
+            if str(saved['fingerprint']) != fingerprint:
+                return None
+            vocabulary = saved['vocabulary'].tobytes().decode()
+            return cls(
+                vocabulary=pd.Index(vocabulary.split("\n") if vocabulary else [], dtype=object),
+                indptr=saved['indptr'],
+                rows=saved['rows'],
+                freqs=saved['freqs'],
+                doc_lengths=saved['doc_lengths'],
+                first_row=int(saved['first_row']),
+            )
+
+
+class SearchIndex:
+    """Search over all postings: the segment built at load time plus one small segment per merged delta."""
+
+    def __init__(self, segments):
+        self.segments = segments
+
+    @classmethod
+    def load_or_build(cls, df, fingerprint, path):
+        """Reuses the index saved at path for this data, or builds it and saves it there."""
+        try:
+            segment = SearchSegment.load(path, fingerprint)
+            if segment is not None:
+                logging.info(f"Loaded search index with {len(segment.vocabulary)} terms from {path}.")
+                return cls([segment])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Could not read search index at {path}, rebuilding it: {e}")
+
+        segment = SearchSegment.build(df['job_title'], df['job_description'])
+        logging.info(f"Built search index: {len(segment.vocabulary)} terms, {len(segment.rows)} postings.")
+        save_optional(path, lambda f: segment.save(f, fingerprint), "search index")
+        return cls([segment])
+
+    def copy(self):
+        """An index sharing the segments, which append can extend without changing this one."""
+        return SearchIndex(list(self.segments))
+
+    def append(self, titles, descriptions, first_row):
+        """Indexes postings appended to the data, without touching the existing segments."""
+        self.segments.append(SearchSegment.build(titles, descriptions, first_row))
+
+    def search(self, query, df):
+        """Row ids of postings containing every term and phrase of the query, best BM25 match first, and their scores."""
+        terms, phrases = parse_query(query)
+        if not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        # Collection statistics over all segments
+        doc_count = sum(len(segment.doc_lengths) for segment in self.segments)
+        avg_length = max(sum(int(segment.doc_lengths.sum()) for segment in self.segments) / max(doc_count, 1), 1.0)
+        postings = [[segment.postings(term) for term in terms] for segment in self.segments]
+        doc_freqs = np.array([sum(len(segment_postings[i][0]) for segment_postings in postings) for i in range(len(terms))])
+        idf = np.log(1 + (doc_count - doc_freqs + 0.5) / (doc_freqs + 0.5))
+
+        matched_rows, matched_scores = [], []
+        for segment, segment_postings in zip(self.segments, postings):
+            # Rarest term first keeps the intersections small
+            candidates = None
+            for rows, _ in sorted(segment_postings, key=lambda posting: len(posting[0])):
+                candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+                if not len(candidates):
+                    break
+            if candidates is None or not len(candidates):
+                continue
+            lengths = segment.doc_lengths[candidates - segment.first_row]
+            scores = np.zeros(len(candidates))
+            for term_idf, (rows, freqs) in zip(idf, segment_postings):
+                tf = freqs[np.searchsorted(rows, candidates)]
+                scores += term_idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length))
+            matched_rows.append(candidates.astype(np.int64))
+            matched_scores.append(scores)
+        if not matched_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        rows, scores = np.concatenate(matched_rows), np.concatenate(matched_scores)
+
+        # Phrases are checked on the text of the postings that hold all their terms
+        if phrases:
+            texts = posting_texts(df['job_title'].take(rows), df['job_description'].take(rows))
+            keep = np.ones(len(rows), dtype=bool)
+            for phrase in phrases:
+                pattern = r"(?<!\w)" + r"\W+".join(re.escape(term) for term in phrase) + r"(?!\w)"
+                keep &= texts.str.contains(pattern, case=False, regex=True).to_numpy()
+            rows, scores = rows[keep], scores[keep]
+
+        order = np.argsort(-scores, kind="stable")
+        return rows[order], scores[order]
@@ -0,0 +1,21 @@
+"""Saving the files that only speed up later loads, such as the local snapshot and the saved indexes."""
+import os
+import logging
+
+
+def save_optional(path, write, what):
+    """Atomically writes the file at path with write(f), where f is a temporary binary file. Returns whether it was saved.
+
+    Failures are logged and otherwise ignored: these files are only an optimization, whatever reads them
+    rebuilds their content when they are missing.
+    """
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a half-written file behind
+        with open(path + ".tmp", "wb") as f:
+            write(f)
+        os.replace(path + ".tmp", path)
+        return True
+    except Exception as e:
+        logging.warning(f"Could not save {what} to {path}: {e}")
+        return False
@@ -0,0 +1,21 @@
+"""Near-duplicate clustering of posting descriptions."""
+import numpy as np
+import pandas as pd
+
+from dedup import DuplicateIndex
+
+TEXT = "We are hiring a data engineer to build pipelines in python and sql for our analytics team"
+
+
+def test_placeholder_descriptions_stay_unique():
+    descriptions = pd.Series(["Unknown"] * 50 + [TEXT, TEXT + " today", "", "  unknown "])
+    index = DuplicateIndex.build(descriptions)
+    assert index.duplicate_of[:50].tolist() == list(range(50))
+    assert index.duplicate_of[51] == 50 # Real near-duplicates are still clustered
+    assert len(index.unique_rows) == 53
+
+
+def test_appended_placeholders_stay_unique():
+    index = DuplicateIndex.build(pd.Series(["Unknown", TEXT]))
+    index.append(pd.Series(["Unknown", "Unknown", TEXT + " now"]), first_row=2)
+    np.testing.assert_array_equal(index.duplicate_of, [0, 1, 2, 3, 1])
@@ -0,0 +1,153 @@
+"""Merging delta files into JobData through refresh()."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+from analytics import JobData
+from ingest import clean_data
+
+CATEGORIES = ['Engineering', 'Sales', 'Healthcare']
+STATES = ['CA', 'NY', 'TX', 'Remote']
+
+
+def postings(count, seed=0):
+    """Raw postings as read from a CSV file, each with its own description."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'job_title': [f"Title {i % 7}" for i in range(count)],
+        'company_name': [f"Company {i % 5}" for i in range(count)],
+        'category': rng.choice(CATEGORIES, count),
+        'state': rng.choice(STATES, count),
+        'job_type': rng.choice(['Full-time', 'Contract'], count),
+        'job_description': [f"Posting {i} needs python and sql for project {i * 7} in team {i * 13}" for i in range(count)],
+        'date_posted': pd.date_range("2024-03-01", periods=count, freq="D").strftime("%Y-%m-%d"),
+    })
+
+
+@pytest.fixture
+def job_data(tmp_path, monkeypatch):
+    """JobData over 30 postings, with its saved indexes and delta files in a temporary directory."""
+    monkeypatch.setattr(analytics, "DELTA_DIR", str(tmp_path / "deltas"))
+    for name in ("SEARCH_INDEX_PATH", "TITLE_MAPPING_PATH", "DUPLICATES_PATH"):
+        monkeypatch.setattr(analytics, name, str(tmp_path / name.lower()))
+    (tmp_path / "deltas").mkdir()
+    raw = postings(30)
+    return JobData(clean_data(raw.copy())), raw, tmp_path / "deltas"
+
+
+def cube_total(data):
+    return int(data.state.cube.tables['canonical_title']['count'].sum())
+
+
+def test_update_only_delta_is_applied_once(job_data):
+    data, raw, deltas = job_data
+    changed = raw.iloc[:2].copy()
+    changed['category'] = 'Legal'
+    changed.to_csv(deltas / "0001.csv", index=False)
+
+    assert data.refresh(force=True) == (0, 2)
+    segments = len(data.state.search.segments)
+    for _ in range(2):
+        assert data.refresh(force=True) == (0, 0)
+    state = data.state
+    assert len(state.df) == 30
+    assert cube_total(data) == 30
+    assert len(state.search.segments) == segments
+    assert (state.df['category'].iloc[:2] == 'Legal').all()
+    assert len(state.row_index.select({'category': ['Legal'], 'state': []})) == 2
+
+
+def test_delta_leaves_the_published_state_untouched(job_data):
+    data, raw, deltas = job_data
+    before = data.state
+    row_groups = {col: dict(levels) for col, levels in before.row_index.rows.items()}
+    segments = len(before.search.segments)
+    delta = pd.concat([postings(5, seed=1).assign(job_description=lambda d: "New " + d['job_description']), raw.iloc[:3]])
+    delta['category'] = 'Legal'
+    delta.to_csv(deltas / "0001.csv", index=False)
+
+    assert data.refresh(force=True) == (5, 3)
+    assert data.state is not before
+    assert len(before.df) == 30 and len(data.state.df) == 35
+    assert int(before.cube.tables['canonical_title']['count'].sum()) == 30
+    assert 'Legal' not in before.row_index.rows['category']
+    assert all(before.row_index.rows[col][level] is ids for col, levels in row_groups.items() for level, ids in levels.items())
+    assert len(before.search.segments) == segments
+    assert len(before.duplicates.duplicate_of) == 30
+    assert before.skills.matrix.shape[0] == 30
+    assert cube_total(data) == 35
+
+
+def test_failed_delta_publishes_nothing(job_data, monkeypatch):
+    data, raw, deltas = job_data
+    before = data.state
+    postings(4, seed=2).assign(job_description=lambda d: "Other " + d['job_description']).to_csv(deltas / "0001.csv", index=False)
+
+    append = analytics.DuplicateIndex.append
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("duplicate index failed")
+    monkeypatch.setattr(analytics.DuplicateIndex, "append", fail)
+    assert data.refresh(force=True) == (0, 0)
+    assert data.state is before
+    assert cube_total(data) == 30
+
+    monkeypatch.setattr(analytics.DuplicateIndex, "append", append)
+    assert data.refresh(force=True) == (4, 0)
+    assert cube_total(data) == 34
+
+
+def trend_total(data, category):
+    return int(data.state.trends.daily({'category': [category], 'state': []})['Postings'].sum())
+
+
+def test_undated_delta_keeps_known_posting_dates(job_data):
+    data, raw, deltas = job_data
+    dates = data.state.df['posting_date'].iloc[:3].tolist()
+    delta = pd.concat([raw.iloc[:3], postings(1, seed=3).assign(job_description="A brand new posting")]).drop(columns='date_posted')
+    delta.to_csv(deltas / "0001.csv", index=False)
+
+    assert data.refresh(force=True) == (1, 0)
+    df = data.state.df
+    assert df['posting_date'].iloc[:3].tolist() == dates
+    assert df['posting_date'].iloc[-1] == pd.Timestamp((deltas / "0001.csv").stat().st_mtime, unit='s').normalize()
+
+
+def test_undated_change_moves_trend_counts_on_its_date(job_data):
+    data, raw, deltas = job_data
+    date = data.state.df['posting_date'].iat[0]
+    category = raw['category'].iat[0]
+    before = trend_total(data, category)
+    raw.iloc[:1].assign(category='Legal').drop(columns='date_posted').to_csv(deltas / "0001.csv", index=False)
+
+    assert data.refresh(force=True) == (0, 1)
+    assert data.state.df['posting_date'].iat[0] == date
+    assert trend_total(data, category) == before - 1
+    legal = data.state.trends.daily({'category': ['Legal'], 'state': []})['Postings']
+    assert legal[legal > 0].index.tolist() == [date]
+
+
+def test_update_only_delta_may_leave_columns_out(job_data):
+    data, raw, deltas = job_data
+    job_types = data.state.df['job_type'].iloc[:2].tolist()
+    raw.iloc[:2].assign(category='Legal').drop(columns='job_type').to_csv(deltas / "0001.csv", index=False)
+
+    assert data.refresh(force=True) == (0, 2)
+    df = data.state.df
+    assert df['job_type'].iloc[:2].tolist() == job_types
+    assert (df['category'].iloc[:2] == 'Legal').all()
+    assert cube_total(data) == 30
+
+
+def test_new_postings_without_a_dimension_are_rejected_once(job_data, caplog):
+    data, raw, deltas = job_data
+    before = data.state
+    postings(2, seed=4).assign(job_description="Another new posting").drop(columns='job_type').to_csv(deltas / "0001.csv", index=False)
+
+    assert data.refresh(force=True) == (0, 0)
+    assert data.state is before
+    assert "lack the job_type column" in caplog.text
+    caplog.clear()
+    assert data.refresh(force=True) == (0, 0)
+    assert "0001.csv" not in caplog.text
@@ -0,0 +1,122 @@
+"""Count cube, trend rollups and salary sketches, checked against the row-level functions they stand in for."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+from analytics import (
+    SALARY_DIMENSIONS,
+    SALARY_FILTER_BITS,
+    TREND_DIMENSIONS,
+    TREND_FILTER_BITS,
+    CountCube,
+    SalarySketches,
+    TrendRollup,
+    row_daily,
+    row_region_summary,
+    row_salary_quantiles,
+)
+from ingest import clean_data
+
+
+def frame(count, states, seed=0):
+    """Cleaned postings spread over the given number of state labels."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'category': pd.Categorical(rng.choice(['Engineering', 'Sales'], count)),
+        'state': pd.Categorical([f"S{i % states}" for i in range(count)]),
+        'posting_date': pd.Timestamp("2024-03-01") + pd.to_timedelta(rng.integers(0, 30, count), unit='D'),
+        'canonical_title': pd.Categorical(rng.choice(['Engineer', 'Manager'], count)),
+        'company_name': pd.Categorical(rng.choice(['Acme', 'Globex'], count)),
+        'annual_salary': rng.uniform(40_000, 200_000, count).astype(np.float32),
+    })
+
+
+def test_region_summary_matches_rows():
+    df = frame(500, 20)
+    regions = pd.Series([f"R{i % 6}" for i in range(20)], index=[f"S{i}" for i in range(20)])
+    cube = CountCube(df, ['canonical_title', 'company_name'])
+    assert cube.complete
+    pd.testing.assert_frame_equal(
+        cube.region_summary({'category': ['Sales']}, regions),
+        row_region_summary(df[df['category'] == 'Sales'], regions),
+    )
+
+
+def test_count_cube_stops_counting_past_its_key_fields(monkeypatch):
+    monkeypatch.setattr(analytics, "CUBE_KEY_BITS", 4)
+    monkeypatch.setattr(analytics, "CUBE_KEY_MASK", (1 << 4) - 1)
+    df = frame(500, 20)
+    cube = CountCube(df, ['canonical_title', 'company_name'])
+    assert not cube.complete
+    assert not len(cube.tables['company_name']['key'])
+
+
+def test_trend_rollup_matches_rows():
+    df = frame(500, 20)
+    rollup = TrendRollup(df, TREND_DIMENSIONS)
+    selections = {'category': ['Sales'], 'state': ['S3', 'S4']}
+    rows = np.flatnonzero(df['category'].eq('Sales') & df['state'].isin(['S3', 'S4']))
+    assert rollup.complete
+    pd.testing.assert_frame_equal(rollup.daily(selections), row_daily(df, rows))
+
+
+@pytest.mark.parametrize("initial_states", [(1 << TREND_FILTER_BITS) + 1, 10])
+def test_trend_rollup_stops_counting_past_its_key_fields(initial_states):
+    df = frame(3000, initial_states)
+    rollup = TrendRollup(df, TREND_DIMENSIONS)
+    if rollup.complete:
+        # A delta adding levels past the field width
+        wide = frame(3000, (1 << TREND_FILTER_BITS) + 1)
+        states = df['state'].cat.categories.union(wide['state'].cat.categories)
+        rollup.add(wide.assign(state=wide['state'].cat.set_categories(states)))
+    assert not rollup.complete
+    assert not len(rollup.tables['canonical_title']['key'])
+
+
+def test_salary_sketches_match_rows():
+    df = frame(500, 20)
+    sketches = SalarySketches(df, SALARY_DIMENSIONS)
+    rows = np.flatnonzero(df['state'].isin(['S1', 'S2']))
+    assert sketches.complete
+    pd.testing.assert_frame_equal(sketches.quantiles({'category': [], 'state': ['S1', 'S2']}), row_salary_quantiles(df, rows))
+
+
+def test_salary_sketches_stop_counting_past_their_key_fields():
+    df = frame(3000, 10)
+    sketches = SalarySketches(df, SALARY_DIMENSIONS)
+    wide = frame(3000, (1 << SALARY_FILTER_BITS) + 1)
+    states = df['state'].cat.categories.union(wide['state'].cat.categories)
+    sketches.add(wide.assign(state=wide['state'].cat.set_categories(states)))
+    assert not sketches.complete
+    assert not len(sketches.tables['canonical_title']['key'])
+    assert not SalarySketches(wide, SALARY_DIMENSIONS).complete
+
+
+def test_merged_deltas_match_a_rebuild():
+    df = frame(2000, 20)
+    rollup = TrendRollup(df.iloc[:1500], TREND_DIMENSIONS)
+    rollup.add(df.iloc[1500:])
+    rollup.add(df.iloc[:0])
+    rollup.add(df.iloc[:400], sign=-1)
+    rebuilt = TrendRollup(df.iloc[400:], TREND_DIMENSIONS)
+    for dim, table in rebuilt.tables.items():
+        assert table.keys() == rollup.tables[dim].keys()
+        for field, values in table.items():
+            np.testing.assert_array_equal(rollup.tables[dim][field], values)
+
+
+def test_dates_outside_the_day_field_are_not_counted():
+    df = frame(100, 5)
+    df.loc[:1, 'posting_date'] = [pd.Timestamp("1969-12-31"), pd.Timestamp("2200-01-01")]
+    rollup = TrendRollup(df, TREND_DIMENSIONS)
+    daily = rollup.daily({'category': [], 'state': []})
+    assert daily['Postings'].sum() == 98
+    assert daily.index.min() >= pd.Timestamp("2024-03-01") and daily.index.max() < pd.Timestamp("2024-04-01")
+    pd.testing.assert_frame_equal(daily, row_daily(df, None))
+
+
+def test_implausible_posting_dates_are_dropped_at_ingest():
+    dates = ["9999-12-31", "1900-01-01", "2024-03-05", "not a date"]
+    df = clean_data(pd.DataFrame({'job_title': ["Engineer"] * 4, 'date_posted': dates}))
+    assert df['posting_date'].isna().tolist() == [True, True, False, True]
@@ -0,0 +1,9 @@
+"""Canonicalization of raw job titles."""
+from titles import canonicalize_titles
+
+
+def test_tech_is_only_expanded_as_the_last_word():
+    titles = ['Tech Lead - AI/ML', 'Tech Support', 'Pharmacy Tech', 'Sr. Surgical Tech (Nights)', 'Tech']
+    assert canonicalize_titles(titles).tolist() == [
+        'Tech Lead - AI/ML', 'Tech Support', 'Pharmacy Technician', 'Surgical Technician', 'Technician',
+    ]
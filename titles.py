@@ -0,0 +1,132 @@
+"""Canonical job titles: raw titles normalized for case, seniority, location suffixes and synonyms."""
+import os
+import re
+import json
+import hashlib
+import logging
+
+import numpy as np
+import pandas as pd
+
+# --- Canonicalization Rules ---
+# Applied in this order to the lowercased raw title. Changing any of them changes rules_fingerprint(),
+# which discards the persisted mapping.
+BRACKETS_PATTERN = r"\([^)]*\)|\[[^\]]*\]" # "(Hybrid)", "[Req 1234]"
+# A location after a separator: " - Remote", " | New York, NY", " - Austin, TX 78701"
+LOCATION_SUFFIX_PATTERN = (
+    r"\s+[-–|@]\s+(?:remote|hybrid|on-?site|in[- ]office|work from home|wfh|[a-z .']+,\s*[a-z]{2}\b[\d\s-]*)$"
+    r"|,\s*[a-z .']+,\s*[a-z]{2}$" # ", Austin, TX"
+)
+WORK_MODE_WORDS = ['remote', 'hybrid', 'onsite', 'on-site', 'work from home', 'wfh'] # Dropped anywhere in the title
+SENIORITY_WORDS = [
+    'senior', 'sr', 'junior', 'jr', 'entry level', 'entry-level', 'mid level', 'mid-level', 'experienced', 'trainee',
+    'i', 'ii', 'iii', 'iv', 'level 1', 'level 2', 'level 3',
+]
+SENIORITY_PREFIXES = ['lead', 'principal', 'staff'] # Only dropped at the start: "Lead Developer" but "Team Lead"
+# Abbreviations and variant spellings, matched as whole words
+TITLE_SYNONYMS = {
+    'dev': 'developer', 'engr': 'engineer', 'eng': 'engineer', 'mgr': 'manager', 'asst': 'assistant',
+    'admin': 'administrator', 'coord': 'coordinator', 'rep': 'representative', 'spec': 'specialist',
+    'acct': 'accountant', 'svp': 'vice president', 'vp': 'vice president',
+    'swe': 'software engineer', 'sde': 'software developer', 'rn': 'registered nurse', 'lpn': 'licensed practical nurse',
+    'cna': 'certified nursing assistant', 'programmer': 'developer', 'fullstack': 'full stack', 'full-stack': 'full stack',
+    'front-end': 'frontend', 'front end': 'frontend', 'back-end': 'backend', 'back end': 'backend',
+}
+# Only replaced as the last word: "Pharmacy Tech" is a technician, "Tech Lead" and "Tech Support" keep their word
+TITLE_FINAL_SYNONYMS = {'tech': 'technician'}
+TITLE_ACRONYMS = ['it', 'qa', 'hr', 'ui', 'ux', 'ai', 'ml', 'seo', 'sql', 'aws', 'cpa', 'cdl', 'erp', 'crm'] # Kept upper case
+
+
+def words_pattern(words):
+    """Regex matching any of the words or phrases as whole words (captured in group 1), with an optional trailing dot."""
+    alternatives = "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True)) # Longest first
+    return rf"(?<![\w-])({alternatives})(?![\w-])\.?"
+
+
+SENIORITY_PATTERN = words_pattern(SENIORITY_WORDS)
+SENIORITY_PREFIX_PATTERN = "^" + words_pattern(SENIORITY_PREFIXES)
+WORK_MODE_PATTERN = words_pattern(WORK_MODE_WORDS)
+SYNONYMS_PATTERN = re.compile(words_pattern(TITLE_SYNONYMS))
+FINAL_SYNONYMS_PATTERN = re.compile(words_pattern(TITLE_FINAL_SYNONYMS) + "$")
+ACRONYMS_PATTERN = re.compile(rf"(?<![\w.'])(?:{'|'.join(TITLE_ACRONYMS)})(?!\w)", re.IGNORECASE)
+
+
+def rules_fingerprint():
+    """Hash of every rule above, stored with the persisted mapping so rule changes invalidate it."""
+    rules = [
+        BRACKETS_PATTERN, LOCATION_SUFFIX_PATTERN, WORK_MODE_WORDS, SENIORITY_WORDS, SENIORITY_PREFIXES,
+        TITLE_SYNONYMS, TITLE_FINAL_SYNONYMS, TITLE_ACRONYMS,
+    ]
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode()).hexdigest()
+
+
+def canonicalize_titles(titles):
+    """Canonical form of each of the given distinct raw titles, with one vectorized pass per rule."""
+    text = pd.Series(titles, dtype=object).astype(str)
+    text = text.str.lower().str.replace(BRACKETS_PATTERN, " ", regex=True).str.strip()
+    text = text.str.replace(LOCATION_SUFFIX_PATTERN, "", regex=True)
+    text = text.str.replace(WORK_MODE_PATTERN, " ", regex=True)
+    text = text.str.replace(SENIORITY_PATTERN, " ", regex=True).str.strip()
+    text = text.str.replace(SENIORITY_PREFIX_PATTERN, " ", regex=True)
+    text = text.str.replace(SYNONYMS_PATTERN, lambda match: TITLE_SYNONYMS[match.group(1)], regex=True)
+    text = text.str.replace(r"\s+", " ", regex=True).str.strip(" -–|,/&.:")
+    text = text.str.replace(FINAL_SYNONYMS_PATTERN, lambda match: TITLE_FINAL_SYNONYMS[match.group(1)], regex=True)
+    # A title made only of dropped words ("Senior", "Remote") keeps its own text
+    fallback = pd.Series(titles, dtype=object).astype(str).str.lower().str.strip()
+    text = text.where(text != "", fallback)
+    # Title case, except after a dot or apostrophe ("Node.js") and for acronyms ("IT Support Specialist")
+    text = text.str.replace(r"(?<![\w.'])[a-z]", lambda match: match.group(0).upper(), regex=True)
+    return text.str.replace(ACRONYMS_PATTERN, lambda match: match.group(0).upper(), regex=True).to_numpy()
+
+
+class TitleMapping:
+    """Raw to canonical title table, grown with each new distinct title seen and persisted across reloads."""
+
+    def __init__(self, mapping=None):
+        self.mapping = mapping if mapping is not None else pd.Series(dtype=object) # Raw title -> canonical title
+        self.changed = False # New titles were added since the mapping was loaded or saved
+
+    @classmethod
+    def load(cls, path):
+        """Reads the mapping saved at path, or starts an empty one if it is missing or was built with other rules."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read title mapping at {path}, rebuilding it: {e}")
+            return cls()
+        if saved.get("rules") != rules_fingerprint():
+            logging.info(f"Title mapping at {path} was built with other rules, rebuilding it.")
+            return cls()
+        titles = saved.get("titles", {})
+        logging.info(f"Loaded title mapping with {len(titles)} titles from {path}.")
+        return cls(pd.Series(titles, dtype=object))
+
+    def canonicalize(self, titles):
+        """Canonical titles for a categorical title column. Only levels missing from the mapping are processed."""
+        levels = titles.cat.categories
+        missing = levels[~levels.isin(self.mapping.index)]
+        if len(missing):
+            self.mapping = pd.concat([self.mapping, pd.Series(canonicalize_titles(missing), index=missing, dtype=object)])
+            self.changed = True
+            logging.info(f"Canonicalized {len(missing)} new distinct titles.")
+        # Canonical level per raw level, then looked up by each row's raw code
+        level_codes, canonical = pd.factorize(self.mapping.reindex(levels).to_numpy(), sort=True)
+        codes = np.asarray(level_codes, dtype=np.int64)[titles.cat.codes.to_numpy()]
+        return pd.Categorical.from_codes(codes, categories=canonical)
+
+    def save(self, path):
+        """Atomically writes the mapping if it gained titles. Failures are logged, the mapping is only a cache."""
+        if not self.changed:
+            return
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"rules": rules_fingerprint(), "titles": self.mapping.to_dict()}, f)
+            os.replace(path + ".tmp", path)
+            self.changed = False
+            logging.info(f"Saved title mapping with {len(self.mapping)} titles to {path}.")
+        except OSError as e:
+            logging.warning(f"Could not save title mapping to {path}: {e}")